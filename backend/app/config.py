@@ -70,6 +70,9 @@ class Settings(BaseSettings):
     llm_rate_limit_requests: int = Field(default=100)
     llm_rate_limit_period: int = Field(default=60)
     llm_max_context_messages: int = Field(default=50)
+    llm_context_history_tokens: int = Field(default=1500)   # chat history + lessons in planner prompt
+    llm_skip_trivial_reflection: bool = Field(default=True)  # no LLM call to reflect on clean single-step actions
+    llm_reflection_flush_every: int = Field(default=5)       # reflections buffered per lesson-store write; 1 = write-through
 
     # Execution
     enable_code_execution: bool = Field(default=True)
@@ -78,6 +81,7 @@ class Settings(BaseSettings):
 
     # File system
     workspace_root: str = Field(default="./workspaces")
+    analyzer_cache_path: str | None = Field(default=None)   # persistent per-file analysis cache; unset = off
     max_file_size: int = Field(default=10_485_760)
 
     allowed_file_extensions: list[str] = Field(
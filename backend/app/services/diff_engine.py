@@ -15,6 +15,7 @@ from __future__ import annotations
 
 import difflib
 import hashlib
+import os
 import shutil
 import threading
 from dataclasses import dataclass, field
@@ -36,6 +37,25 @@ class DiffOperation(str, Enum):
     DELETE = "delete"
 
 
+class DiffWarningCode(str, Enum):
+    FILE_ALREADY_EXISTS = "file_already_exists"
+    FILE_NOT_FOUND = "file_not_found"
+    INTEGRITY_MISMATCH = "integrity_mismatch"
+    EXCEEDS_SIZE_LIMIT = "exceeds_size_limit"
+    LARGE_CHANGE = "large_change"
+
+
+class DiffWarning(str):
+    """A validation warning: reads as its message, carries a stable `code`."""
+
+    code: DiffWarningCode
+
+    def __new__(cls, code: DiffWarningCode, message: str) -> DiffWarning:
+        obj = super().__new__(cls, message)
+        obj.code = code
+        return obj
+
+
 @dataclass
 class FileDiff:
     """Represents a pending or applied diff for a single file."""
@@ -94,11 +114,13 @@ class DiffEngine:
         self,
         workspace_root: str | Path,
         backup_retention_days: int = 7,
+        fsync: bool = False,
     ) -> None:
         self.workspace_root = Path(workspace_root).resolve()
         self.backup_dir = self.workspace_root / ".project_core_backups"
         self.backup_dir.mkdir(parents=True, exist_ok=True)
         self._backup_retention_days = backup_retention_days
+        self.fsync = fsync   # fsync every write (durable, but a disk flush each)
         self._lock = threading.Lock()
 
     # -----------------------------------------------------------------------
@@ -121,7 +143,7 @@ class DiffEngine:
             operation: CREATE | MODIFY | DELETE.
             original_content: Explicit original; read from disk if absent.
         """
-        logger.debug("Creating diff — %s %s", operation.value, file_path)
+        logger.debug("Creating diff — {} {}", operation.value, file_path)
         full_path = self.workspace_root / file_path
 
         # Resolve original content
@@ -129,7 +151,7 @@ class DiffEngine:
             if full_path.exists():
                 original_content = full_path.read_text(encoding="utf-8", errors="replace")
             else:
-                logger.warning("%s does not exist; treating as CREATE", file_path)
+                logger.warning("{} does not exist; treating as CREATE", file_path)
                 operation = DiffOperation.CREATE
                 original_content = None
 
@@ -176,25 +198,32 @@ class DiffEngine:
     # Validation
     # -----------------------------------------------------------------------
 
-    def validate_diff(self, diff: FileDiff) -> tuple[bool, list[str]]:
+    def validate_diff(self, diff: FileDiff) -> tuple[bool, list[DiffWarning]]:
         """
         Pre-apply validation.
 
         Returns:
-            (is_valid, list_of_warnings)
+            (is_valid, list_of_warnings) — each warning is a str with a
+            `.code` (DiffWarningCode) for exact matching.
         """
-        warnings: list[str] = []
+        warnings: list[DiffWarning] = []
         full_path = self.workspace_root / diff.file_path
 
         # File existence checks
         if diff.operation == DiffOperation.CREATE:
             if full_path.exists():
-                warnings.append(f"CREATE: file already exists — {diff.file_path}")
+                warnings.append(DiffWarning(
+                    DiffWarningCode.FILE_ALREADY_EXISTS,
+                    f"CREATE: file already exists — {diff.file_path}",
+                ))
                 return False, warnings
 
         elif diff.operation in (DiffOperation.MODIFY, DiffOperation.DELETE):
             if not full_path.exists():
-                warnings.append(f"{diff.operation.value.upper()}: file not found — {diff.file_path}")
+                warnings.append(DiffWarning(
+                    DiffWarningCode.FILE_NOT_FOUND,
+                    f"{diff.operation.value.upper()}: file not found — {diff.file_path}",
+                ))
                 return False, warnings
 
         # Content integrity check (if we have original)
@@ -203,29 +232,55 @@ class DiffEngine:
                 full_path.read_bytes()
             ).hexdigest()
             if current_sha != diff.checksum_before:
-                warnings.append(
+                warnings.append(DiffWarning(
+                    DiffWarningCode.INTEGRITY_MISMATCH,
                     f"INTEGRITY: {diff.file_path} was modified since diff was created — "
-                    "contents may have changed."
-                )
+                    "contents may have changed.",
+                ))
 
         # Size guard
-        content = diff.new_content or ""
-        if len(content.encode("utf-8")) > _MAX_FILE_SIZE_BYTES:
-            warnings.append(
-                f"SIZE: {diff.file_path} exceeds {_MAX_FILE_SIZE_BYTES // 1024 // 1024} MB limit"
-            )
+        if self._exceeds_size_limit(diff, full_path):
+            warnings.append(DiffWarning(
+                DiffWarningCode.EXCEEDS_SIZE_LIMIT,
+                f"SIZE: {diff.file_path} exceeds {_MAX_FILE_SIZE_BYTES // 1024 // 1024} MB limit",
+            ))
             return False, warnings
 
         # Large change warning
         total_lines = diff.line_changes["additions"] + diff.line_changes["deletions"]
         if total_lines > _LARGE_DIFF_LINES:
-            warnings.append(
+            warnings.append(DiffWarning(
+                DiffWarningCode.LARGE_CHANGE,
                 f"Large change: {total_lines} lines modified in {diff.file_path}. "
-                "Consider splitting into smaller diffs."
-            )
+                "Consider splitting into smaller diffs.",
+            ))
 
         return True, warnings
 
+    @staticmethod
+    def _exceeds_size_limit(diff: FileDiff, full_path: Path) -> bool:
+        """
+        Size check without a full encode in the common case: UTF-8 uses 1–4
+        bytes per code point, so the char count bounds the byte count and
+        only content in the ambiguous band gets encoded.
+
+        A MODIFY whose original was never loaded is also checked against the
+        file's on-disk size (one stat, no read).
+        """
+        content = diff.new_content or ""
+        n_chars = len(content)
+        if n_chars > _MAX_FILE_SIZE_BYTES:
+            return True
+        if n_chars * 4 > _MAX_FILE_SIZE_BYTES and len(content.encode("utf-8")) > _MAX_FILE_SIZE_BYTES:
+            return True
+
+        if diff.operation == DiffOperation.MODIFY and diff.original_content is None:
+            try:
+                return os.stat(full_path).st_size > _MAX_FILE_SIZE_BYTES
+            except OSError:
+                return False
+        return False
+
     # -----------------------------------------------------------------------
     # Single diff apply / rollback
     # -----------------------------------------------------------------------
@@ -244,12 +299,12 @@ class DiffEngine:
         with self._lock:
             valid, warnings = self.validate_diff(diff)
             for w in warnings:
-                logger.warning("Diff warning: %s", w)
+                logger.warning("Diff warning: {}", w)
             if not valid:
                 raise ValueError(f"Invalid diff for {diff.file_path}: {warnings}")
 
             if dry_run:
-                logger.info("[DRY-RUN] Would %s: %s", diff.operation.value, diff.file_path)
+                logger.info("[DRY-RUN] Would {}: {}", diff.operation.value, diff.file_path)
                 return True
 
             full_path = self.workspace_root / diff.file_path
@@ -260,13 +315,13 @@ class DiffEngine:
                 diff.backup_path = self._create_backup(full_path)
 
             if diff.operation == DiffOperation.CREATE:
-                full_path.write_text(diff.new_content or "", encoding="utf-8")
-                logger.info("✅ Created : %s (+%d lines)", diff.file_path, diff.line_changes["additions"])
+                self._write_file(full_path, diff.new_content or "")
+                logger.info("✅ Created : {} (+{} lines)", diff.file_path, diff.line_changes["additions"])
 
             elif diff.operation == DiffOperation.MODIFY:
-                full_path.write_text(diff.new_content or "", encoding="utf-8")
+                self._write_file(full_path, diff.new_content or "")
                 logger.info(
-                    "✅ Modified: %s (+%d/-%d)",
+                    "✅ Modified: {} (+{}/-{})",
                     diff.file_path,
                     diff.line_changes["additions"],
                     diff.line_changes["deletions"],
@@ -274,7 +329,7 @@ class DiffEngine:
 
             elif diff.operation == DiffOperation.DELETE:
                 full_path.unlink()
-                logger.info("✅ Deleted : %s", diff.file_path)
+                logger.info("✅ Deleted : {}", diff.file_path)
 
             diff.applied = True
             diff.applied_at = datetime.now(timezone.utc).isoformat()
@@ -283,7 +338,7 @@ class DiffEngine:
     def rollback_diff(self, diff: FileDiff) -> bool:
         """Undo a single applied diff."""
         if not diff.applied:
-            logger.debug("Diff not applied — nothing to roll back: %s", diff.file_path)
+            logger.debug("Diff not applied — nothing to roll back: {}", diff.file_path)
             return True
 
         with self._lock:
@@ -292,7 +347,7 @@ class DiffEngine:
                 if diff.operation == DiffOperation.CREATE:
                     if full_path.exists():
                         full_path.unlink()
-                    logger.info("🔄 Rolled back CREATE: %s", diff.file_path)
+                    logger.info("🔄 Rolled back CREATE: {}", diff.file_path)
 
                 elif diff.operation in (DiffOperation.MODIFY, DiffOperation.DELETE):
                     if diff.backup_path:
@@ -300,17 +355,17 @@ class DiffEngine:
                     else:
                         # No backup — reconstruct from original_content
                         if diff.original_content is not None:
-                            full_path.write_text(diff.original_content, encoding="utf-8")
+                            self._write_file(full_path, diff.original_content)
                         else:
-                            logger.warning("No backup or original_content for rollback of %s", diff.file_path)
+                            logger.warning("No backup or original_content for rollback of {}", diff.file_path)
                             return False
-                    logger.info("🔄 Rolled back %s: %s", diff.operation.value, diff.file_path)
+                    logger.info("🔄 Rolled back {}: {}", diff.operation.value, diff.file_path)
 
                 diff.applied = False
                 return True
 
             except Exception as exc:
-                logger.error("Rollback failed for %s: %s", diff.file_path, exc)
+                logger.error("Rollback failed for {}: {}", diff.file_path, exc)
                 return False
 
     # -----------------------------------------------------------------------
@@ -341,16 +396,16 @@ class DiffEngine:
             except Exception as exc:
                 result.failed += 1
                 result.errors.append({"index": idx, "file": diff.file_path, "error": str(exc)})
-                logger.error("Diff %d failed (%s): %s", idx, diff.file_path, exc)
+                logger.error("Diff {} failed ({}): {}", idx, diff.file_path, exc)
 
                 if stop_on_error:
-                    logger.warning("Stopping and rolling back %d applied diffs", len(applied_so_far))
+                    logger.warning("Stopping and rolling back {} applied diffs", len(applied_so_far))
                     rb = self.rollback_diffs(applied_so_far)
                     result.applied -= rb.rolled_back
                     break
 
         logger.info(
-            "apply_diffs — %d/%d applied, %d failed",
+            "apply_diffs — {}/{} applied, {} failed",
             result.applied, result.total, result.failed,
         )
         return result
@@ -363,7 +418,7 @@ class DiffEngine:
                 rolled_back += 1
             else:
                 failed += 1
-        logger.info("rollback_diffs — %d rolled back, %d failed", rolled_back, failed)
+        logger.info("rollback_diffs — {} rolled back, {} failed", rolled_back, failed)
         return RollbackResult(total=len(diffs), rolled_back=rolled_back, failed=failed)
 
     # -----------------------------------------------------------------------
@@ -401,9 +456,18 @@ class DiffEngine:
         )
 
     # -----------------------------------------------------------------------
-    # Backup helpers
+    # Write / backup helpers
     # -----------------------------------------------------------------------
 
+    def _write_file(self, path: Path, content: str) -> None:
+        if not self.fsync:
+            path.write_text(content, encoding="utf-8")
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+
     def _create_backup(self, file_path: Path) -> str | None:
         if not file_path.exists():
             return None
@@ -413,7 +477,7 @@ class DiffEngine:
         backup_name = f"{file_path.name}.{ts}.{stem_hash}.bak"
         backup_path = self.backup_dir / backup_name
         shutil.copy2(file_path, backup_path)
-        logger.debug("Backup created: %s", backup_path)
+        logger.debug("Backup created: {}", backup_path)
         return str(backup_path)
 
     def _restore_backup(self, file_path: Path, backup_path: str) -> None:
@@ -421,9 +485,9 @@ class DiffEngine:
         if bp.exists():
             file_path.parent.mkdir(parents=True, exist_ok=True)
             shutil.copy2(bp, file_path)
-            logger.debug("Restored from backup: %s → %s", bp.name, file_path)
+            logger.debug("Restored from backup: {} → {}", bp.name, file_path)
         else:
-            logger.warning("Backup not found: %s", backup_path)
+            logger.warning("Backup not found: {}", backup_path)
 
     def cleanup_backups(self) -> int:
         """Remove backup files older than retention period. Returns count deleted."""
@@ -439,7 +503,7 @@ class DiffEngine:
             except Exception:
                 pass
         if removed:
-            logger.info("Cleaned up %d old backups", removed)
+            logger.info("Cleaned up {} old backups", removed)
         return removed
 
 
@@ -199,7 +199,7 @@ class CodeExecutor:
         Returns:
             Execution results dict.
         """
-        logger.info("🛠  Executing plan: %s", plan.get("summary", "N/A"))
+        logger.info("🛠  Executing plan: {}", plan.get("summary", "N/A"))
 
         results: dict[str, Any] = {
             "files_created": [],
@@ -238,7 +238,7 @@ class CodeExecutor:
                 )
 
         logger.info(
-            "%s Execution complete — %d files generated",
+            "{} Execution complete — {} files generated",
             "✅" if results["success"] else "❌",
             results["files_generated"],
         )
@@ -380,7 +380,7 @@ class CodeExecutor:
                 return {"success": False, "error": f"Unknown action: {action}"}
 
         except Exception as exc:
-            logger.error("Step execution error for %s: %s", file_path, exc, exc_info=True)
+            logger.error("Step execution error for {}: {}", file_path, exc, exc_info=True)
             return {"success": False, "error": str(exc)}
 
     # -----------------------------------------------------------------------
@@ -396,7 +396,7 @@ class CodeExecutor:
         plan: dict[str, Any],
         step: dict[str, Any],
     ) -> str:
-        logger.debug("Generating new %s file: %s", language, file_path)
+        logger.debug("Generating new {} file: {}", language, file_path)
         prompt = self._build_create_prompt(file_path, code_intent, language, project, plan, step)
         system = LANGUAGE_PROMPTS.get(language, _generic_system_prompt)()
 
@@ -409,7 +409,7 @@ class CodeExecutor:
             )
             return self._extract_code(raw, language)
         except Exception as exc:
-            logger.error("Code generation failed for %s: %s", file_path, exc)
+            logger.error("Code generation failed for {}: {}", file_path, exc)
             return self._stub(file_path, language, code_intent)
 
     async def _generate_modification(
@@ -422,7 +422,7 @@ class CodeExecutor:
         plan: dict[str, Any],
         step: dict[str, Any],
     ) -> str:
-        logger.debug("Generating modification for: %s", file_path)
+        logger.debug("Generating modification for: {}", file_path)
         prompt = self._build_modify_prompt(
             file_path, original, code_intent, language, project, plan, step
         )
@@ -442,7 +442,7 @@ class CodeExecutor:
                 return original + f"\n\n# TODO: {code_intent}\n"
             return code
         except Exception as exc:
-            logger.error("Modification generation failed for %s: %s", file_path, exc)
+            logger.error("Modification generation failed for {}: {}", file_path, exc)
             return original + f"\n\n# TODO: {code_intent}\n"
 
     # -----------------------------------------------------------------------
@@ -598,7 +598,7 @@ class CodeExecutor:
 
     async def rollback_action(self, action: Action, project: Project) -> None:
         """Rollback all diffs associated with an action."""
-        logger.info("🔄 Rolling back action %s", action.id)
+        logger.info("🔄 Rolling back action {}", action.id)
 
         diffs = getattr(action, "diffs", None)
         if not diffs:
@@ -617,4 +617,4 @@ class CodeExecutor:
         ]
 
         result = self.diff_engine.rollback_diffs(file_diffs)
-        logger.info("✅ Rollback complete: %d/%d diffs reversed", result["rolled_back"], result["total"])
+        logger.info("✅ Rollback complete: {}/{} diffs reversed", result["rolled_back"], result["total"])
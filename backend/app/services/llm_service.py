@@ -12,8 +12,10 @@ Uses the latest anthropic SDK patterns:
 from __future__ import annotations
 
 import asyncio
+import copy
+import hashlib
+import io
 import json
-import re
 from collections import deque
 from datetime import datetime, timedelta, timezone
 from typing import Any, AsyncGenerator
@@ -33,6 +35,84 @@ from app.utils.exceptions import LLMError, RateLimitError
 from app.utils.token_counter import count_tokens, estimate_cost
 
 
+# ---------------------------------------------------------------------------
+# JSON salvage
+# ---------------------------------------------------------------------------
+
+def _extract_first_json_object(text: str) -> str | None:
+    """
+    Return the first complete top-level ``{...}`` object in `text`.
+
+    Single linear pass tracking brace depth and string/escape state, so
+    braces inside string literals are ignored and trailing junk or a second
+    candidate object is never swallowed. Returns None if no object closes.
+    """
+    return _JsonObjectScanner().feed(text)
+
+
+class _JsonObjectScanner:
+    """
+    Incremental `_extract_first_json_object` for streamed text: `feed()`
+    chunks as they arrive and get the object back as soon as it closes.
+    Scan state carries across chunks, so every character is examined once.
+    """
+
+    __slots__ = ("_parts", "_started", "_depth", "_in_string", "_escape")
+
+    def __init__(self) -> None:
+        self._parts: list[str] = []
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> str | None:
+        start = 0
+        if not self._started:
+            start = chunk.find("{")
+            if start == -1:
+                return None
+            self._started = True
+
+        depth = self._depth
+        in_string = self._in_string
+        escape = self._escape
+        for i in range(start, len(chunk)):
+            ch = chunk[i]
+            if in_string:
+                if escape:
+                    escape = False
+                elif ch == "\\":
+                    escape = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    self._parts.append(chunk[start:i + 1])
+                    return "".join(self._parts)
+
+        self._parts.append(chunk[start:])
+        self._depth = depth
+        self._in_string = in_string
+        self._escape = escape
+        return None
+
+
+class _InFlight:
+    """A coalesced structured call: the shared task and how many callers await it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task[dict[str, Any]]) -> None:
+        self.task = task
+        self.waiters = 0
+
+
 # ---------------------------------------------------------------------------
 # Rate limiter
 # ---------------------------------------------------------------------------
@@ -91,6 +171,9 @@ class LLMService:
             period_seconds=settings.llm_rate_limit_period,
         )
 
+        # In-flight structured calls keyed by request hash (see generate_structured_raw)
+        self._inflight: dict[str, _InFlight] = {}
+
         # Usage tracking
         self.total_requests: int = 0
         self.total_input_tokens: int = 0
@@ -171,10 +254,92 @@ class LLMService:
         Automatically strips markdown fences if present.
         Raises LLMError if the response is not valid JSON.
         """
-        json_prompt = f"{prompt}\n\nRespond with ONLY valid JSON — no markdown fences, no prose."
+        return await self.generate_structured_raw(
+            prompt=self.json_prompt(prompt),
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs,
+        )
 
+    @staticmethod
+    def json_prompt(prompt: str) -> str:
+        """Append the JSON-only instruction used by `generate_structured`."""
+        return f"{prompt}\n\nRespond with ONLY valid JSON — no markdown fences, no prose."
+
+    async def generate_structured_raw(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        """
+        Like `generate_structured`, but `prompt` is sent as-is.
+
+        Callers that retry should build the prompt once with `json_prompt()`
+        so every attempt sends identical bytes (prompt-cache friendly).
+
+        Identical concurrent requests are coalesced: while one is in flight,
+        later callers await its result (each gets its own copy) instead of
+        spending tokens on a duplicate call. The call runs as its own task, so
+        a cancelled caller leaves it running for the others; it is cancelled
+        only once every caller has gone.
+        """
+        key = self._inflight_key(prompt, system_prompt, temperature, max_tokens, kwargs)
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _InFlight(asyncio.create_task(self._run_inflight(
+                key,
+                prompt=prompt,
+                system_prompt=system_prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **kwargs,
+            )))
+            self._inflight[key] = flight
+        else:
+            logger.debug("Coalescing duplicate in-flight LLM request {}", key[:12])
+
+        flight.waiters += 1
+        try:
+            # shield: a cancelled caller must not cancel the shared call
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.task.cancelled():
+                raise
+            flight.waiters -= 1
+            if not flight.waiters:
+                # Nobody left to want the answer — stop spending tokens, and
+                # let the next identical request start afresh
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+                flight.task.cancel()
+            raise
+        # The task left _inflight before completing, so the caller set is
+        # final: a sole caller takes the result as-is, others each get a copy
+        return result if flight.waiters == 1 else copy.deepcopy(result)
+
+    async def _run_inflight(self, key: str, **kwargs: Any) -> dict[str, Any]:
+        """Body of a coalesced call; deregisters itself before it completes."""
+        try:
+            return await self._generate_json(**kwargs)
+        finally:
+            flight = self._inflight.get(key)
+            if flight is not None and flight.task is asyncio.current_task():
+                del self._inflight[key]
+
+    async def _generate_json(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
         raw = await self.generate(
-            prompt=json_prompt,
+            prompt=prompt,
             system_prompt=system_prompt,
             temperature=temperature if temperature is not None else 0.2,
             max_tokens=max_tokens,
@@ -187,14 +352,15 @@ class LLMService:
         try:
             return json.loads(clean)
         except json.JSONDecodeError:
-            # Try to salvage a partial JSON object
-            match = re.search(r"\{.*\}", clean, re.DOTALL)
-            if match:
+            # Try to salvage the first complete JSON object
+            candidate = _extract_first_json_object(clean)
+            if candidate is not None:
                 try:
-                    return json.loads(match.group())
+                    return json.loads(candidate)
                 except json.JSONDecodeError:
                     pass
-            logger.error("Could not parse JSON: {!r:.200}", clean)
+            # Lazy + slice first: never repr() a huge response just to log it
+            logger.opt(lazy=True).error("Could not parse JSON: {!r}", lambda: clean[:200])
             raise LLMError(f"Invalid JSON from LLM: {clean[:200]!r}")
 
     # -----------------------------------------------------------------------
@@ -205,11 +371,18 @@ class LLMService:
         self,
         prompt: str,
         system_prompt: str | None = None,
+        coalesce_chars: int = 0,
         **kwargs: Any,
     ) -> AsyncGenerator[str, None]:
         """
         Stream text chunks from Claude as they arrive.
 
+        Args:
+            coalesce_chars: If > 0, buffer chunks and yield them in batches of
+                at least this many characters (remainder flushed at the end).
+                Cuts per-chunk overhead for websocket/SSE consumers; 0 yields
+                every chunk immediately.
+
         Usage:
             async for chunk in llm.generate_stream(prompt):
                 print(chunk, end="", flush=True)
@@ -227,9 +400,19 @@ class LLMService:
             params["system"] = system_prompt
 
         try:
+            buf = io.StringIO() if coalesce_chars > 0 else None
             async with self.client.messages.stream(**params) as stream:
                 async for chunk in stream.text_stream:
-                    yield chunk
+                    if buf is None:
+                        yield chunk
+                        continue
+                    buf.write(chunk)
+                    if buf.tell() >= coalesce_chars:
+                        yield buf.getvalue()
+                        buf.seek(0)
+                        buf.truncate()
+            if buf is not None and buf.tell():
+                yield buf.getvalue()
 
             # Final usage tracking
             final = await stream.get_final_message()
@@ -294,6 +477,20 @@ class LLMService:
     # Helpers
     # -----------------------------------------------------------------------
 
+    @staticmethod
+    def _inflight_key(
+        prompt: str,
+        system_prompt: str | None,
+        temperature: float | None,
+        max_tokens: int | None,
+        kwargs: dict[str, Any],
+    ) -> str:
+        payload = json.dumps(
+            [prompt, system_prompt, temperature, max_tokens, kwargs],
+            sort_keys=True, default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
     def _track_usage(self, usage: Any) -> None:
         self.total_requests += 1
         inp = getattr(usage, "input_tokens", 0)
@@ -304,12 +501,29 @@ class LLMService:
 
     @staticmethod
     def _strip_fences(text: str) -> str:
-        """Remove markdown code fences from LLM output."""
+        """
+        Remove markdown code fences from LLM output.
+
+        Plain str.find/rfind scans — no regex backtracking when the closing
+        fence is missing from a long response.
+        """
         # ```json ... ``` or ``` ... ```
-        match = re.search(r"```(?:json)?\s*\n?(.*?)```", text, re.DOTALL)
-        if match:
-            return match.group(1).strip()
-        return text.strip()
+        start = text.find("```")
+        if start == -1:
+            return text.strip()
+
+        body_start = start + 3
+        newline = text.find("\n", body_start)
+        tag_end = newline if newline != -1 else len(text)
+        tag = text[body_start:tag_end].strip()
+        if not tag or tag.isalnum():
+            # Language tag (or nothing) on the fence line — body starts below
+            body_start = tag_end + 1
+        elif text.startswith("json", body_start):
+            body_start += 4
+
+        end = text.rfind("```", body_start)
+        return (text[body_start:end] if end != -1 else text[body_start:]).strip()
 
 
 # ---------------------------------------------------------------------------
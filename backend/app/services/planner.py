@@ -3,7 +3,7 @@ Intelligent Planner - Enhanced Production Implementation
 
 AI-powered planning with the latest Anthropic SDK patterns:
 - Structured JSON output with strict validation
-- Retry logic with exponential back-off
+- Retry logic with full-jitter exponential back-off (tenacity)
 - Token budget awareness
 - Session-level memory injection
 - Pydantic-based plan validation
@@ -12,16 +12,29 @@ AI-powered planning with the latest Anthropic SDK patterns:
 from __future__ import annotations
 
 import asyncio
+import itertools
 import json
 import re
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterable
 
 from loguru import logger
 from pydantic import BaseModel, Field, field_validator, model_validator
-
-from app.models.database import Project
+from tenacity import (
+    RetryCallState,
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from app.config import settings
 from app.services.llm_service import LLMService
 from app.utils.code_analyzer import CodeAnalyzer
+from app.utils.exceptions import LLMError, RateLimitError
+from app.utils.token_counter import count_tokens
+
+if TYPE_CHECKING:
+    from app.models.database import Project
 
 
 # ---------------------------------------------------------------------------
@@ -75,6 +88,12 @@ class ExecutionPlan(BaseModel):
     estimated_complexity: str = "medium"
     assumptions: list[str] = Field(default_factory=list)
     success_criteria: list[str] = Field(default_factory=list)
+    # Enrichment added by the Planner (never trusted from Claude output)
+    project_id: int | None = None
+    project_language: str | None = None
+    project_framework: str | None = None
+    tech_stack: str = ""
+    requires_approval: bool = False
 
     @field_validator("estimated_complexity")
     @classmethod
@@ -144,7 +163,42 @@ JSON schema (output ONLY this structure):
 
 # How many times to retry a failed Claude call
 _MAX_RETRIES = 3
-_RETRY_DELAY_BASE = 1.5   # seconds
+_RETRY_BACKOFF_MULTIPLIER = 1.0   # seconds
+_RETRY_MAX_DELAY = 30.0           # seconds
+# Failures worth another attempt (transient API errors / malformed JSON)
+_RETRYABLE_ERRORS = (LLMError, RateLimitError, json.JSONDecodeError)
+
+# Count caps on the planner prompt's history sections, applied on top of the
+# shared token budget (settings.llm_context_history_tokens)
+_MAX_CONTEXT_LESSONS = 5
+_MAX_CONTEXT_MESSAGES = 4
+
+
+def _log_retry(state: RetryCallState) -> None:
+    exc = state.outcome.exception() if state.outcome else None
+    delay = state.next_action.sleep if state.next_action else 0.0
+    logger.warning(
+        "Attempt {} — Claude call failed: {}; retrying in {:.1f} s",
+        state.attempt_number, exc, delay,
+    )
+
+
+def _take_within_budget(newest_first: Iterable[str], budget: int) -> tuple[list[str], int]:
+    """
+    Keep the newest lines whose combined token count fits in `budget`.
+
+    Returns the kept lines in chronological order and the tokens they use.
+    """
+    kept: list[str] = []
+    used = 0
+    for line in newest_first:
+        cost = count_tokens(line)
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    kept.reverse()
+    return kept, used
 
 
 # ---------------------------------------------------------------------------
@@ -157,7 +211,7 @@ class Planner:
 
     Enhancements over v1:
     - Pydantic validation of every generated plan
-    - Retry logic with exponential back-off
+    - Retry logic with full-jitter exponential back-off
     - JSON extraction from dirty LLM output
     - Token-budget-aware context trimming
     - Lessons injection from past Reflector output
@@ -165,7 +219,7 @@ class Planner:
 
     def __init__(self, llm_service: LLMService) -> None:
         self.llm = llm_service
-        self.analyzer = CodeAnalyzer()
+        self.analyzer = CodeAnalyzer(cache_path=settings.analyzer_cache_path)
 
     # -----------------------------------------------------------------------
     # Public API
@@ -190,20 +244,26 @@ class Planner:
         Returns:
             Validated plan dict ready for CodeExecutor.
         """
-        logger.info("🧠 Planning: %.100s", intent)
+        logger.info("🧠 Planning: {:.100}", intent)
 
         try:
-            # 1 — Project analysis
-            analysis = self.analyzer.analyze_project(project.workspace_path)
+            session_context = session_context or {}
+
+            # 1 — Project analysis (disk-bound, off the event loop) overlapped
+            #     with token-budgeting the session history
+            analysis, (chat_lines, lesson_lines) = await asyncio.gather(
+                asyncio.to_thread(self.analyzer.analyze_project, project.workspace_path),
+                asyncio.to_thread(self._trim_history, session_context, past_lessons or []),
+            )
 
             # 2 — Build context
             context = self._build_context(
                 intent=intent,
                 analysis=analysis,
-                session_context=session_context or {},
-                past_lessons=past_lessons or [],
+                session_context=session_context,
+                chat_lines=chat_lines,
+                lesson_lines=lesson_lines,
             )
-
             # 3 — Claude call with retries
             raw = await self._call_with_retries(context)
 
@@ -211,7 +271,7 @@ class Planner:
             plan = self._validate_plan(raw, project, analysis)
 
             logger.info(
-                "✅ Plan ready — %d steps, %d new files, %d modifications",
+                "✅ Plan ready — {} steps, {} new files, {} modifications",
                 len(plan["steps"]),
                 len(plan["files_to_create"]),
                 len(plan["files_to_modify"]),
@@ -226,17 +286,58 @@ class Planner:
     # Context builder
     # -----------------------------------------------------------------------
 
+    def _trim_history(
+        self,
+        session_context: dict[str, Any],
+        past_lessons: list[str],
+    ) -> tuple[list[str], list[str]]:
+        """
+        Format past lessons and chat history as context lines, capped both by
+        count and by one shared token budget
+        (`settings.llm_context_history_tokens`); oldest entries go first.
+        Lessons are budgeted first so a long conversation can't crowd them
+        out — the chat gets whatever they leave.
+        """
+        budget = settings.llm_context_history_tokens
+        lesson_lines, used = _take_within_budget(
+            (
+                f"  • {lesson}"
+                for lesson in itertools.islice(reversed(past_lessons), _MAX_CONTEXT_LESSONS)
+            ),
+            budget,
+        )
+        chat_history = session_context.get("chat_history") or []
+        chat_lines, _ = _take_within_budget(
+            (
+                f"  [{msg.get('role', 'user')}] {str(msg.get('content', ''))[:200]}"
+                for msg in itertools.islice(reversed(chat_history), _MAX_CONTEXT_MESSAGES)
+            ),
+            budget - used,
+        )
+        dropped = (
+            min(len(past_lessons), _MAX_CONTEXT_LESSONS) - len(lesson_lines)
+            + min(len(chat_history), _MAX_CONTEXT_MESSAGES) - len(chat_lines)
+        )
+        if dropped:
+            logger.debug(
+                "Context trimmed — dropped {} old messages/lessons to fit {}-token budget",
+                dropped, budget,
+            )
+        return chat_lines, lesson_lines
+
     def _build_context(
         self,
         intent: str,
         analysis: dict[str, Any],
         session_context: dict[str, Any],
-        past_lessons: list[str],
+        chat_lines: list[str],
+        lesson_lines: list[str],
     ) -> str:
         """
         Build a rich yet token-efficient context string for Claude.
 
         We keep each section tightly bounded to avoid hitting token limits.
+        `chat_lines` / `lesson_lines` come pre-budgeted from `_trim_history`.
         """
         parts: list[str] = [
             "# USER REQUEST",
@@ -293,18 +394,14 @@ class Planner:
                 parts.append(f"Last action     : {session_context['last_action']}")
             if session_context.get("recent_files"):
                 parts.append(f"Recently edited : {', '.join(session_context['recent_files'][:6])}")
-            if session_context.get("chat_history"):
+            if chat_lines:
                 parts.append("Recent messages :")
-                for msg in session_context["chat_history"][-4:]:
-                    role = msg.get("role", "user")
-                    text = str(msg.get("content", ""))[:200]
-                    parts.append(f"  [{role}] {text}")
+                parts += chat_lines
 
         # Past lessons
-        if past_lessons:
+        if lesson_lines:
             parts += ["", "# LESSONS FROM PAST ACTIONS"]
-            for lesson in past_lessons[-5:]:
-                parts.append(f"  • {lesson}")
+            parts += lesson_lines
 
         parts += [
             "",
@@ -321,33 +418,35 @@ class Planner:
     # -----------------------------------------------------------------------
 
     async def _call_with_retries(self, context: str) -> dict[str, Any]:
-        """Call Claude with retry + exponential back-off."""
-        last_exc: Exception | None = None
-
-        for attempt in range(1, _MAX_RETRIES + 1):
-            try:
-                raw = await self.llm.generate_structured(
-                    prompt=context,
-                    system_prompt=PLANNING_SYSTEM_PROMPT,
-                    temperature=0.2,
-                    max_tokens=4096,
-                )
-                return raw
+        """
+        Call Claude with retry + full-jitter exponential back-off.
 
-            except json.JSONDecodeError as exc:
-                logger.warning("Attempt %d — JSON parse failed: %s", attempt, exc)
-                last_exc = exc
+        Randomised delays keep concurrent planners from retrying in lock-step
+        after a transient overload.
+        """
 
-            except Exception as exc:
-                logger.warning("Attempt %d — Claude call failed: %s", attempt, exc)
-                last_exc = exc
+        # Built once so every attempt sends byte-identical prompts
+        json_prompt = LLMService.json_prompt(context)
 
-            if attempt < _MAX_RETRIES:
-                delay = _RETRY_DELAY_BASE ** attempt
-                logger.debug("Retrying in %.1f s …", delay)
-                await asyncio.sleep(delay)
+        @retry(
+            stop=stop_after_attempt(_MAX_RETRIES),
+            wait=wait_random_exponential(multiplier=_RETRY_BACKOFF_MULTIPLIER, max=_RETRY_MAX_DELAY),
+            retry=retry_if_exception_type(_RETRYABLE_ERRORS),
+            before_sleep=_log_retry,
+            reraise=True,
+        )
+        async def _do_call() -> dict[str, Any]:
+            return await self.llm.generate_structured_raw(
+                prompt=json_prompt,
+                system_prompt=PLANNING_SYSTEM_PROMPT,
+                temperature=0.2,
+                max_tokens=4096,
+            )
 
-        raise RuntimeError(f"All {_MAX_RETRIES} planning attempts failed") from last_exc
+        try:
+            return await _do_call()
+        except _RETRYABLE_ERRORS as exc:
+            raise RuntimeError(f"All {_MAX_RETRIES} planning attempts failed") from exc
 
     # -----------------------------------------------------------------------
     # Plan validation
@@ -365,7 +464,7 @@ class Planner:
         try:
             plan_obj = ExecutionPlan.model_validate(raw)
         except Exception as exc:
-            logger.warning("Pydantic validation issue — best-effort coercion: %s", exc)
+            logger.warning("Pydantic validation issue — best-effort coercion: {}", exc)
             # Coerce what we can
             plan_obj = ExecutionPlan(
                 summary=raw.get("summary", "Execute user request"),
@@ -373,34 +472,38 @@ class Planner:
                 steps=self._coerce_steps(raw.get("steps", [])),
             )
 
-        plan = plan_obj.model_dump()
-
-        # Sync file lists with steps
+        # Sync file lists with steps (mutated in place on the model).
+        # Sets shadow the lists so membership stays O(1) as steps grow;
+        # appending keeps Claude's ordering.
         existing = set(analysis.get("source_files", []))
-        for step in plan["steps"]:
-            fp = step.get("file_path", "")
+        to_modify = set(plan_obj.files_to_modify)
+        to_create = set(plan_obj.files_to_create)
+        for step in plan_obj.steps:
+            fp = step.file_path
             if not fp:
                 continue
             if fp in existing:
-                if fp not in plan["files_to_modify"]:
-                    plan["files_to_modify"].append(fp)
+                if fp not in to_modify:
+                    to_modify.add(fp)
+                    plan_obj.files_to_modify.append(fp)
             else:
-                if fp not in plan["files_to_create"]:
-                    plan["files_to_create"].append(fp)
+                if fp not in to_create:
+                    to_create.add(fp)
+                    plan_obj.files_to_create.append(fp)
 
         # Metadata
-        plan["project_id"] = project.id
-        plan["project_language"] = project.language
-        plan["project_framework"] = project.framework
-        plan["tech_stack"] = analysis.get("tech_stack_summary", "")
-        plan["requires_approval"] = (
-            bool(plan["files_to_delete"])
-            or plan["estimated_complexity"] == "high"
-            or len(plan["risks"]) > 2
-            or any("breaking" in r.lower() for r in plan["risks"])
+        plan_obj.project_id = project.id
+        plan_obj.project_language = project.language
+        plan_obj.project_framework = project.framework
+        plan_obj.tech_stack = analysis.get("tech_stack_summary", "")
+        plan_obj.requires_approval = (
+            bool(plan_obj.files_to_delete)
+            or plan_obj.estimated_complexity == "high"
+            or len(plan_obj.risks) > 2
+            or any("breaking" in r.lower() for r in plan_obj.risks)
         )
 
-        return plan
+        return plan_obj.model_dump()
 
     def _coerce_steps(self, raw_steps: list[Any]) -> list[PlanStep]:
         steps: list[PlanStep] = []
@@ -5,7 +5,7 @@ Analyses execution results, stores lessons persistently (JSON-backed),
 and surfaces actionable improvement suggestions for future planning.
 
 Improvements over v1:
-- Pydantic ReflectionResult for type safety
+- Typed ReflectionResult schema (slotted dataclass)
 - JSON-file-backed lesson store (survives restarts)
 - Lesson deduplication via fuzzy-key hashing
 - Categorised lessons: quality / security / performance / architecture
@@ -14,43 +14,82 @@ Improvements over v1:
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import contextlib
 import hashlib
+import heapq
 import json
+import os
 import re
-from dataclasses import dataclass, field, asdict
+import sys
+import threading
+import weakref
+from dataclasses import MISSING, asdict, dataclass, field, fields
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
 
 from loguru import logger
-from pydantic import BaseModel, Field
 
-from app.models.database import Action
+from app.config import settings
 from app.services.llm_service import LLMService
 
+if TYPE_CHECKING:
+    from app.models.database import Action
+
+try:
+    import fcntl
+except ImportError:     # Windows: single-worker deployments only
+    fcntl = None
+
 
 # ---------------------------------------------------------------------------
-# Pydantic schema for the reflection output
+# Schema for the reflection output
 # ---------------------------------------------------------------------------
 
-class ReflectionResult(BaseModel):
+@dataclass(slots=True)
+class ReflectionResult:
     summary: str
-    success_factors: list[str] = Field(default_factory=list)
-    failure_factors: list[str] = Field(default_factory=list)
-    lessons_learned: list[str] = Field(default_factory=list)
-    suggestions: list[str] = Field(default_factory=list)
-    patterns_detected: list[str] = Field(default_factory=list)
+    success_factors: list[str] = field(default_factory=list)
+    failure_factors: list[str] = field(default_factory=list)
+    lessons_learned: list[str] = field(default_factory=list)
+    suggestions: list[str] = field(default_factory=list)
+    patterns_detected: list[str] = field(default_factory=list)
     risk_assessment: str = ""
     complexity_assessment: str = ""
     # Enhanced fields
-    category_tags: list[str] = Field(default_factory=list)   # quality | security | perf | arch
+    category_tags: list[str] = field(default_factory=list)   # quality | security | perf | arch
     severity: str = "info"    # info | warning | critical
 
 
+# ReflectionResult's fields in schema order with their defaults (None: required).
+# _parse_reflection checks LLM output against this directly — a model
+# round-trip per reflection just to get the same dict back is wasted work.
+_REFLECTION_DEFAULTS: dict[str, Any] = {
+    f.name: (
+        f.default_factory() if f.default_factory is not MISSING
+        else None if f.default is MISSING
+        else f.default
+    )
+    for f in fields(ReflectionResult)
+}
+
+
 # ---------------------------------------------------------------------------
 # Lesson store entry
 # ---------------------------------------------------------------------------
 
+# Dedup key only — no security requirement. BLAKE2s with a 6-byte digest
+# yields the 12 hex chars directly and beats truncated MD5 on short strings.
+_LESSON_HASH = "blake2s-48"
+
+
+def _lesson_hash(stripped: str) -> str:
+    """Dedup key for an already-stripped lesson text (case-insensitive)."""
+    return hashlib.blake2s(stripped.lower().encode(), digest_size=6).hexdigest()
+
+
 @dataclass
 class LessonEntry:
     lesson: str
@@ -62,9 +101,58 @@ class LessonEntry:
 
     def __post_init__(self) -> None:
         if not self.hash_key:
-            self.hash_key = hashlib.md5(
-                self.lesson.lower().strip().encode()
-            ).hexdigest()[:12]
+            self.hash_key = _lesson_hash(self.lesson.strip())
+
+
+@dataclass(slots=True)
+class _LessonIndex:
+    """
+    In-memory views over one project's store["lessons"], kept in step with
+    every append and eviction. Never serialised — rebuilt on load.
+    """
+
+    hashes: set[str] = field(default_factory=set)
+    # Column copies of the fields the suggestion scan reads, aligned
+    # index-for-index with store["lessons"]
+    categories: list[str] = field(default_factory=list)
+    texts: list[str] = field(default_factory=list)
+    # Inverted index: category -> ascending absolute positions of its
+    # lessons. A lesson's current column index is its position - evicted.
+    by_category: dict[str, list[int]] = field(default_factory=dict)
+    evicted: int = 0
+
+    def add(self, entries: list[dict[str, Any]]) -> None:
+        self.hashes.update(e["hash_key"] for e in entries if "hash_key" in e)
+        cats = [e.get("category", "") for e in entries]
+        for pos, cat in enumerate(cats, self.evicted + len(self.categories)):
+            self.by_category.setdefault(cat, []).append(pos)
+        self.categories.extend(cats)
+        self.texts.extend([e.get("lesson", "") for e in entries])
+
+    def evict(self, entries: list[dict[str, Any]]) -> None:
+        """Drop the oldest len(entries) lessons (the front of the store)."""
+        count = len(entries)
+        for e in entries:
+            # Evicted lessons may be learned again, so forget their keys too
+            self.hashes.discard(e.get("hash_key"))
+        dropped: dict[str, int] = {}
+        for cat in self.categories[:count]:
+            dropped[cat] = dropped.get(cat, 0) + 1
+        for cat, n in dropped.items():
+            positions = self.by_category[cat]
+            del positions[:n]           # the oldest are always at the front
+            if not positions:
+                del self.by_category[cat]
+        del self.categories[:count]
+        del self.texts[:count]
+        self.evicted += count
+
+    def newest_in(self, categories: Iterable[str]) -> Iterator[tuple[str, str]]:
+        """(category, text) of lessons in *categories*, most recent first."""
+        runs = [reversed(self.by_category[c]) for c in categories if c in self.by_category]
+        for pos in heapq.merge(*runs, reverse=True):
+            i = pos - self.evicted
+            yield self.categories[i], self.texts[i]
 
 
 # ---------------------------------------------------------------------------
@@ -99,19 +187,58 @@ JSON schema (output ONLY this):
 _LESSON_STORE_DIR = Path(".project_core_data")
 _MAX_LESSONS_PER_PROJECT = 100
 _MAX_PATTERNS_PER_PROJECT = 30
+# Reflections append one record to lessons_{id}.jsonl; every Nth folds the
+# log back into the lessons_{id}.json snapshot
+_LOG_COMPACT_EVERY = 20
+
+# Lesson category -> (suggestion prefix, plan-intent keywords that make it
+# relevant; substring match). Plain `in` scans beat a regex alternation here,
+# and a single overlapping-match pass over all keywords was slower still.
+_CATEGORY_INTENTS: dict[str, tuple[str, tuple[str, ...]]] = {
+    "security": ("[Security]", ("auth", "login", "password", "token", "user")),
+    "quality": ("[Quality]", ("test", "fix", "refactor")),
+    "performance": ("[Performance]", ("query", "list", "all", "load")),
+    "architecture": ("[Architecture]", ("add", "create", "new", "feature")),
+}
+
+
+def _as_list(value: Any) -> list[Any]:
+    """A reflection list field as a list; a bare scalar becomes one item."""
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [] if value is None or value == "" else [value]
+
+
+def _bullet_section(header: str, items: list[Any] | None, limit: int) -> str:
+    """*header* followed by up to *limit* bullet lines; empty when no items."""
+    if not items:
+        return ""
+    return header + "".join([f"\n  • {item}" for item in items[:limit]])
 
 
 # ---------------------------------------------------------------------------
 # Reflector
 # ---------------------------------------------------------------------------
 
+# Every live Reflector, flushed once at interpreter exit. Weak, so the hook
+# doesn't keep discarded instances (and their caches) alive.
+_live_reflectors: weakref.WeakSet[Reflector] = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_reflectors() -> None:
+    for reflector in list(_live_reflectors):
+        reflector.flush()
+
+
 class Reflector:
     """
     Learning system that analyses every action and persistently stores
     lessons to improve future planning cycles.
 
-    Lesson store is backed by a JSON file per project in
-    `.project_core_data/lessons_{project_id}.json`.
+    Lesson store is backed by a JSON snapshot per project in
+    `.project_core_data/lessons_{project_id}.json`, plus an append-only
+    `lessons_{project_id}.jsonl` log of the reflections since that snapshot.
     """
 
     def __init__(self, llm_service: LLMService, data_dir: str | Path | None = None) -> None:
@@ -120,6 +247,21 @@ class Reflector:
         self._data_dir.mkdir(parents=True, exist_ok=True)
         # In-memory cache: project_id -> store dict
         self._cache: dict[int, dict[str, Any]] = {}
+        # Records appended to each project's log since its last snapshot
+        self._log_pending: dict[int, int] = {}
+        # Per cached project: dedup keys and column views of its lessons,
+        # so neither dedup nor the suggestion scan walks the entry dicts
+        self._indexes: dict[int, _LessonIndex] = {}
+        # Applied in memory but not yet written: project_id -> log records.
+        # Dropped only once written; a reload re-applies them on top of disk
+        self._unflushed: dict[int, list[dict[str, Any]]] = {}
+        # (mtime_ns, size) of each cached project's snapshot and log as last
+        # read or written — another worker's write changes it (see _is_fresh)
+        self._disk_sigs: dict[int, tuple[tuple[int, int] | None, ...]] = {}
+        # Stores may be loaded off the event loop (see reflect_on_action).
+        # Re-entrant: _persist_lessons holds it across _load_store
+        self._load_lock = threading.RLock()
+        _live_reflectors.add(self)
 
     # -----------------------------------------------------------------------
     # Public API
@@ -137,23 +279,37 @@ class Reflector:
 
         Returns the reflection dict for downstream consumers.
         """
-        logger.info("📚 Reflecting on action %s", action.id)
-
-        try:
-            context = self._build_context(action, plan, execution, verification)
-            raw = await self.llm.generate_structured(
-                prompt=context,
-                system_prompt=REFLECTION_SYSTEM_PROMPT,
-                temperature=0.35,
-                max_tokens=2000,
-            )
-            reflection = self._parse_reflection(raw)
+        logger.info("📚 Reflecting on action {}", action.id)
 
-        except Exception as exc:
-            logger.warning("Claude reflection failed (%s); using heuristic fallback", exc)
+        prefetch = None
+        if settings.llm_skip_trivial_reflection and self._is_trivial(plan, execution, verification):
+            # Nothing for the LLM to learn from — skip the round-trip
             reflection = self._heuristic_reflection(plan, execution, verification)
+            reflection["summary"] = "Trivial action succeeded cleanly (LLM reflection skipped)"
+        else:
+            # Read the lesson store in a worker thread while the LLM call is in flight
+            if action.project_id not in self._cache:
+                prefetch = asyncio.create_task(
+                    asyncio.to_thread(self._load_store, action.project_id)
+                )
+
+            try:
+                context = self._build_context(action, plan, execution, verification)
+                raw = await self.llm.generate_structured(
+                    prompt=context,
+                    system_prompt=REFLECTION_SYSTEM_PROMPT,
+                    temperature=0.35,
+                    max_tokens=2000,
+                )
+                reflection = self._parse_reflection(raw)
+
+            except Exception as exc:
+                logger.warning("Claude reflection failed ({}); using heuristic fallback", exc)
+                reflection = self._heuristic_reflection(plan, execution, verification)
 
         # Store lessons
+        if prefetch is not None:
+            await prefetch
         self._persist_lessons(action, reflection)
 
         # Update action record
@@ -163,7 +319,7 @@ class Reflector:
             pass
 
         logger.info(
-            "✅ Reflection stored — %d lessons, severity: %s",
+            "✅ Reflection stored — {} lessons, severity: {}",
             len(reflection.get("lessons_learned", [])),
             reflection.get("severity", "info"),
         )
@@ -173,6 +329,17 @@ class Reflector:
         """Return full lesson store for a project."""
         return self._load_store(project_id)
 
+    def flush(self, project_id: int | None = None) -> None:
+        """Write buffered reflections to disk — for one project, or all of them."""
+        project_ids = list(self._unflushed) if project_id is None else [project_id]
+        for pid in project_ids:
+            if not self._unflushed.get(pid):
+                continue
+            try:
+                self._write_records(pid)
+            except OSError as exc:     # lock file unavailable — keep them buffered
+                logger.warning("Could not flush lessons for project {}: {}", pid, exc)
+
     def generate_improvement_suggestions(
         self,
         project_id: int,
@@ -183,7 +350,7 @@ class Reflector:
         Generate targeted suggestions based on past lessons and the
         current plan's risk profile.
         """
-        store = self._load_store(project_id)
+        store, index = self._load_indexed(project_id)
         suggestions: list[str] = []
 
         # 1 — Failure-rate based advice
@@ -196,38 +363,26 @@ class Reflector:
 
         # 2 — Category-pattern matching against current plan intent
         intent_lower = str(current_plan.get("summary", "")).lower()
-        lessons: list[dict[str, Any]] = store.get("lessons", [])
-
-        for lesson in reversed(lessons):     # most recent first
-            cat = lesson.get("category", "")
-            text = lesson.get("lesson", "")
-
-            if cat == "security" and any(
-                kw in intent_lower for kw in ("auth", "login", "password", "token", "user")
-            ):
-                suggestions.append(f"[Security] {text}")
-
-            elif cat == "quality" and any(
-                kw in intent_lower for kw in ("test", "fix", "refactor")
-            ):
-                suggestions.append(f"[Quality] {text}")
 
-            elif cat == "performance" and any(
-                kw in intent_lower for kw in ("query", "list", "all", "load")
-            ):
-                suggestions.append(f"[Performance] {text}")
-
-            elif cat == "architecture" and any(
-                kw in intent_lower for kw in ("add", "create", "new", "feature")
-            ):
-                suggestions.append(f"[Architecture] {text}")
+        # Relevance depends only on the intent — decide it once, not per lesson
+        active: dict[str, str] = {
+            cat: prefix
+            for cat, (prefix, keywords) in _CATEGORY_INTENTS.items()
+            if any(kw in intent_lower for kw in keywords)
+        }
 
-            if len(suggestions) >= max_suggestions:
-                break
+        if active and len(suggestions) < max_suggestions:
+            # Only lessons of relevant categories are visited, newest first
+            for cat, text in index.newest_in(active):
+                suggestions.append(f"{active[cat]} {text}")
+                if len(suggestions) >= max_suggestions:
+                    break
 
         # 3 — Risk-level based advice
-        risks = current_plan.get("risks", [])
-        if any("breaking" in r.lower() for r in risks):
+        # One lower() over the joined risks; the newline separator can't
+        # complete a "breaking" match across two entries
+        risks_blob = "\n".join(current_plan.get("risks", [])).lower()
+        if "breaking" in risks_blob:
             suggestions.insert(0, "Breaking change detected — ensure backwards-compatible migration path.")
 
         # 4 — Generic patterns
@@ -249,78 +404,89 @@ class Reflector:
         execution: dict[str, Any],
         verification: dict[str, Any],
     ) -> str:
-        parts: list[str] = [
-            "# ACTION",
-            f"Intent    : {action.intent}",
-            f"Complexity: {plan.get('estimated_complexity', 'unknown')}",
-            f"Steps     : {len(plan.get('steps', []))}",
-            f"New files : {len(plan.get('files_to_create', []))}",
+        # One f-string per fixed block; only the optional sections are joined in
+        cov = verification.get("coverage_percent")
+        return "".join((
+            "# ACTION\n"
+            f"Intent    : {action.intent}\n"
+            f"Complexity: {plan.get('estimated_complexity', 'unknown')}\n"
+            f"Steps     : {len(plan.get('steps', []))}\n"
+            f"New files : {len(plan.get('files_to_create', []))}\n"
             f"Modified  : {len(plan.get('files_to_modify', []))}",
-        ]
-
-        risks = plan.get("risks", [])
-        if risks:
-            parts += ["", "Predicted risks:"]
-            parts += [f"  • {r}" for r in risks[:5]]
-
-        parts += [
-            "",
-            "# EXECUTION",
-            f"Success      : {execution.get('success', False)}",
-            f"Files created: {len(execution.get('files_created', []))}",
+            _bullet_section("\n\nPredicted risks:", plan.get("risks"), 5),
+            "\n\n# EXECUTION\n"
+            f"Success      : {execution.get('success', False)}\n"
+            f"Files created: {len(execution.get('files_created', []))}\n"
             f"Files modified: {len(execution.get('files_modified', []))}",
-        ]
-        if execution.get("errors"):
-            parts += ["Execution errors:"]
-            for e in execution["errors"][:3]:
-                parts += [f"  • {e}"]
-
-        parts += [
-            "",
-            "# VERIFICATION",
-            f"Passed       : {verification.get('passed', False)}",
-            f"Tests run    : {verification.get('tests_run', 0)}",
-            f"Tests passed : {verification.get('tests_passed', 0)}",
-            f"Tests failed : {verification.get('tests_failed', 0)}",
-            f"Syntax valid : {verification.get('syntax_valid', True)}",
+            _bullet_section("\nExecution errors:", execution.get("errors"), 3),
+            "\n\n# VERIFICATION\n"
+            f"Passed       : {verification.get('passed', False)}\n"
+            f"Tests run    : {verification.get('tests_run', 0)}\n"
+            f"Tests passed : {verification.get('tests_passed', 0)}\n"
+            f"Tests failed : {verification.get('tests_failed', 0)}\n"
+            f"Syntax valid : {verification.get('syntax_valid', True)}\n"
             f"Lint valid   : {verification.get('lint_valid', True)}",
-        ]
-        cov = verification.get("coverage_percent")
-        if cov is not None:
-            parts.append(f"Coverage     : {cov}%")
-        if verification.get("errors"):
-            parts += ["Verification errors:"]
-            for e in verification["errors"][:3]:
-                parts += [f"  • {e}"]
-
-        parts += ["", "Provide a concise, actionable reflection. Output ONLY the JSON."]
-        return "\n".join(parts)
+            f"\nCoverage     : {cov}%" if cov is not None else "",
+            _bullet_section("\nVerification errors:", verification.get("errors"), 3),
+            "\n\nProvide a concise, actionable reflection. Output ONLY the JSON.",
+        ))
 
     # -----------------------------------------------------------------------
     # Reflection parsing
     # -----------------------------------------------------------------------
 
     def _parse_reflection(self, raw: dict[str, Any]) -> dict[str, Any]:
-        try:
-            obj = ReflectionResult.model_validate(raw)
-            return obj.model_dump()
-        except Exception as exc:
-            logger.debug("Pydantic reflection parse issue: %s", exc)
-            # Best-effort normalisation
-            raw.setdefault("summary", "Reflection generated")
-            raw.setdefault("lessons_learned", [])
-            raw.setdefault("success_factors", [])
-            raw.setdefault("failure_factors", [])
-            raw.setdefault("suggestions", [])
-            raw.setdefault("patterns_detected", [])
-            raw.setdefault("category_tags", [])
-            raw.setdefault("severity", "info")
-            return raw
+        parsed: dict[str, Any] = {}
+        for name, default in _REFLECTION_DEFAULTS.items():
+            if name not in raw:
+                if default is None:     # required field missing
+                    break
+                parsed[name] = [] if isinstance(default, list) else default
+                continue
+            value = raw[name]
+            if isinstance(default, list):
+                if not (
+                    isinstance(value, (list, tuple)) and all(isinstance(v, str) for v in value)
+                ):
+                    break
+                value = list(value)
+            elif not isinstance(value, str):
+                break
+            parsed[name] = value
+        else:
+            return parsed
+
+        logger.debug("Reflection parse issue: {!r} missing or mistyped", name)
+        # Best-effort normalisation
+        raw.setdefault("summary", "Reflection generated")
+        raw.setdefault("lessons_learned", [])
+        raw.setdefault("success_factors", [])
+        raw.setdefault("failure_factors", [])
+        raw.setdefault("suggestions", [])
+        raw.setdefault("patterns_detected", [])
+        raw.setdefault("category_tags", [])
+        raw.setdefault("severity", "info")
+        return raw
 
     # -----------------------------------------------------------------------
     # Heuristic fallback
     # -----------------------------------------------------------------------
 
+    @staticmethod
+    def _is_trivial(
+        plan: dict[str, Any],
+        execution: dict[str, Any],
+        verification: dict[str, Any],
+    ) -> bool:
+        """A clean, single-step success with no errors anywhere."""
+        return bool(
+            execution.get("success")
+            and verification.get("passed")
+            and not execution.get("errors")
+            and not verification.get("errors")
+            and len(plan.get("steps", [])) <= 1
+        )
+
     def _heuristic_reflection(
         self,
         plan: dict[str, Any],
@@ -377,80 +543,285 @@ class Reflector:
     def _store_path(self, project_id: int) -> Path:
         return self._data_dir / f"lessons_{project_id}.json"
 
-    def _load_store(self, project_id: int) -> dict[str, Any]:
-        if project_id in self._cache:
-            return self._cache[project_id]
+    def _log_path(self, project_id: int) -> Path:
+        return self._data_dir / f"lessons_{project_id}.jsonl"
+
+    @contextlib.contextmanager
+    def _write_lock(self, project_id: int) -> Iterator[None]:
+        """
+        Exclusive advisory lock on a project's store across worker processes,
+        held for a whole flush so no other writer appends or compacts between
+        this worker's freshness check and its write.
+        """
+        if fcntl is None:
+            yield
+            return
+        with (self._data_dir / f"lessons_{project_id}.lock").open("a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _disk_sig(self, project_id: int) -> tuple[tuple[int, int] | None, ...]:
+        sig: list[tuple[int, int] | None] = []
+        # Plain os.stat on str paths — pathlib adds several us per call here
+        base = os.path.join(self._data_dir, f"lessons_{project_id}")
+        for path in (f"{base}.json", f"{base}.jsonl"):
+            try:
+                st = os.stat(path)
+                sig.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def _is_fresh(self, project_id: int) -> bool:
+        """Whether the cached store still reflects disk — two stats, no re-parse."""
+        return self._disk_sigs.get(project_id) == self._disk_sig(project_id)
 
+    def _load_store(self, project_id: int) -> dict[str, Any]:
+        store = self._cache.get(project_id)
+        if store is not None and self._is_fresh(project_id):
+            return store
+
+        with self._load_lock:
+            store = self._cache.get(project_id)
+            if store is not None and self._is_fresh(project_id):
+                return store            # loaded by another thread meanwhile
+            return self._reload(project_id)
+
+    def _load_indexed(self, project_id: int) -> tuple[dict[str, Any], _LessonIndex]:
+        """A store and its index, read as one pair a concurrent reload can't split."""
+        with self._load_lock:
+            return self._load_store(project_id), self._indexes[project_id]
+
+    def _reload(self, project_id: int) -> dict[str, Any]:
+        """
+        Rebuild a project's store from disk, then re-apply this worker's
+        unflushed records on top so another worker's writes and ours merge.
+        Caller holds _load_lock.
+        """
+        # Taken before reading, so a write racing the load forces a reload
+        sig = self._disk_sig(project_id)
+        store = self._read_snapshot(project_id)
+        index = _LessonIndex()
+        index.add(store["lessons"])
+        pending = self._replay_log(project_id, store, index)
+        for record in list(self._unflushed.get(project_id, ())):
+            # Renumber after whatever other workers wrote meanwhile, and drop
+            # lessons one of them already stored
+            record["seq"] = store["log_seq"] + 1
+            record["lessons"] = [
+                e for e in record["lessons"] if e["hash_key"] not in index.hashes
+            ]
+            self._apply_record(store, record, index)
+        # Publish together, only once fully replayed: the _load_store fast
+        # path is unlocked and must never pair a store with another's index
+        self._indexes[project_id] = index
+        self._log_pending[project_id] = pending
+        self._cache[project_id] = store
+        self._disk_sigs[project_id] = sig
+        return store
+
+    def _read_snapshot(self, project_id: int) -> dict[str, Any]:
         path = self._store_path(project_id)
         if path.exists():
             try:
-                data = json.loads(path.read_text(encoding="utf-8"))
-                self._cache[project_id] = data
+                data = json.loads(path.read_bytes())
+                if data.get("hash_algo") != _LESSON_HASH:
+                    # Stores written before the hash switch: re-key once so
+                    # dedup still recognises previously stored lessons
+                    for entry in data.get("lessons", []):
+                        entry["hash_key"] = _lesson_hash(entry.get("lesson", "").strip())
+                    data["hash_algo"] = _LESSON_HASH
+                data.setdefault("log_seq", 0)
+                # A handful of categories repeat across every lesson; share one
+                # string each instead of a fresh copy per parsed entry
+                for entry in data.get("lessons", []):
+                    if type(entry.get("category")) is str:
+                        entry["category"] = sys.intern(entry["category"])
                 return data
             except Exception as exc:
-                logger.warning("Could not load lesson store for project %d: %s", project_id, exc)
+                logger.warning("Could not load lesson store for project {}: {}", project_id, exc)
 
-        empty: dict[str, Any] = {
+        return {
+            "hash_algo": _LESSON_HASH,
+            "log_seq": 0,
             "lessons": [],
             "patterns": [],
             "successes": 0,
             "failures": 0,
         }
-        self._cache[project_id] = empty
-        return empty
+
+    def _replay_log(
+        self, project_id: int, store: dict[str, Any], index: _LessonIndex
+    ) -> int:
+        """
+        Apply append-log records newer than the snapshot to *store* and
+        *index*; returns how many records the log holds past the snapshot.
+        """
+        pending = 0
+        torn = False
+        try:
+            with self._log_path(project_id).open("rb") as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        torn = True     # interrupted append — nothing valid follows
+                        break
+                    # Records already folded into the snapshot survive a crash
+                    # between snapshot write and log removal; skip them
+                    if record["seq"] <= store["log_seq"]:
+                        continue
+                    self._apply_record(store, record, index)
+                    pending += 1
+        except FileNotFoundError:
+            pass
+        except Exception as exc:
+            logger.warning("Could not replay lesson log for project {}: {}", project_id, exc)
+
+        if torn:
+            # Appending after a torn line would corrupt the next record too;
+            # the next write compacts instead (under the write lock)
+            pending = _LOG_COMPACT_EVERY
+        return pending
+
+    @staticmethod
+    def _apply_record(
+        store: dict[str, Any], record: dict[str, Any], index: _LessonIndex
+    ) -> None:
+        lessons: list[dict[str, Any]] = store["lessons"]
+        for entry in record["lessons"]:
+            if type(entry["category"]) is str:
+                entry["category"] = sys.intern(entry["category"])
+        lessons.extend(record["lessons"])
+        index.add(record["lessons"])
+        overflow = len(lessons) - _MAX_LESSONS_PER_PROJECT
+        if overflow > 0:
+            index.evict(lessons[:overflow])
+            del lessons[:overflow]
+        if record["patterns"]:
+            # In-place, order-preserving dedup; re-seen patterns keep their slot
+            patterns: list[str] = store["patterns"]
+            seen = set(patterns)
+            for p in record["patterns"]:
+                if p not in seen:
+                    seen.add(p)
+                    patterns.append(p)
+            del patterns[:-_MAX_PATTERNS_PER_PROJECT]
+        store["successes" if record["ok"] else "failures"] += 1
+        store["log_seq"] = record["seq"]
+
+    def _write_records(self, project_id: int) -> None:
+        """
+        Persist a project's unflushed records: one log append, or a compaction
+        every N records. They stay buffered if the write fails.
+        """
+        with self._write_lock(project_id):
+            if not self._is_fresh(project_id):
+                # Another worker wrote since we last looked: fold its records
+                # in first, or our seqs would collide and compaction drop them
+                with self._load_lock:
+                    self._reload(project_id)
+            records = self._unflushed.get(project_id)
+            if not records:
+                return
+            pending = self._log_pending.get(project_id, 0) + len(records)
+            if pending >= _LOG_COMPACT_EVERY:
+                self._save_store(project_id, self._cache[project_id])
+                return
+            try:
+                with self._log_path(project_id).open("a", encoding="utf-8") as fh:
+                    fh.writelines(
+                        json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n"
+                        for r in records
+                    )
+            except Exception as exc:
+                logger.warning("Could not append to lesson log: {}", exc)
+                return
+            self._log_pending[project_id] = pending
+            self._unflushed.pop(project_id, None)
+            self._disk_sigs[project_id] = self._disk_sig(project_id)
 
     def _save_store(self, project_id: int, store: dict[str, Any]) -> None:
+        """
+        Write a full snapshot and drop the append log it supersedes.
+        Caller holds the project's write lock.
+        """
         path = self._store_path(project_id)
+        # Write-then-rename: a crash mid-write leaves the old snapshot intact
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
         try:
-            path.write_text(json.dumps(store, indent=2, ensure_ascii=False), encoding="utf-8")
+            # Compact separators: indent= forces the pure-Python encoder
+            tmp.write_text(
+                json.dumps(store, ensure_ascii=False, separators=(",", ":")), encoding="utf-8"
+            )
+            os.replace(tmp, path)
             self._cache[project_id] = store
+            self._log_path(project_id).unlink(missing_ok=True)
+            self._log_pending[project_id] = 0
+            self._unflushed.pop(project_id, None)
+            self._disk_sigs[project_id] = self._disk_sig(project_id)
         except Exception as exc:
-            logger.warning("Could not save lesson store: %s", exc)
+            logger.warning("Could not save lesson store: {}", exc)
+            tmp.unlink(missing_ok=True)
 
     def _persist_lessons(self, action: Action, reflection: dict[str, Any]) -> None:
         project_id = action.project_id
-        store = self._load_store(project_id)
-
-        lessons_added = 0
-        existing_hashes = {e["hash_key"] for e in store["lessons"] if "hash_key" in e}
-
-        # Categorise each lesson
-        tags: list[str] = reflection.get("category_tags", ["quality"])
-        category = tags[0] if tags else "quality"
-
-        for lesson_text in reflection.get("lessons_learned", []):
-            if not lesson_text.strip():
-                continue
-            entry = LessonEntry(
-                lesson=lesson_text.strip(),
-                category=category,
-                project_id=project_id,
-                timestamp=datetime.now(timezone.utc).isoformat(),
-                action_id=action.id,
+        # Load, apply and buffer under the lock: a reload in a worker thread
+        # must neither swap the store out from under the record nor miss it
+        with self._load_lock:
+            store = self._load_store(project_id)
+
+            new_lessons: list[dict[str, Any]] = []
+            index = self._indexes[project_id]
+            existing_hashes = index.hashes
+            batch_hashes: set[str] = set()
+
+            # Categorise each lesson. Fallback reflections are unvalidated, and the
+            # category keys _LessonIndex.by_category, so it must be a plain str
+            tags = _as_list(reflection.get("category_tags"))
+            category = sys.intern(str(tags[0])) if tags else "quality"
+
+            for lesson_text in _as_list(reflection.get("lessons_learned")):
+                if not isinstance(lesson_text, str):
+                    continue
+                norm = lesson_text.strip()
+                if not norm:
+                    continue
+                hash_key = _lesson_hash(norm)
+                if hash_key in existing_hashes or hash_key in batch_hashes:
+                    continue
+                entry = LessonEntry(
+                    lesson=norm,
+                    category=category,
+                    project_id=project_id,
+                    timestamp=datetime.now(timezone.utc).isoformat(),
+                    action_id=action.id,
+                    hash_key=hash_key,
+                )
+                new_lessons.append(asdict(entry))
+                batch_hashes.add(hash_key)
+
+            # Track success/failure
+            overall_ok = (
+                len(reflection.get("failure_factors", [])) == 0
+                and reflection.get("severity", "info") != "critical"
             )
-            if entry.hash_key not in existing_hashes:
-                store["lessons"].append(asdict(entry))
-                existing_hashes.add(entry.hash_key)
-                lessons_added += 1
-
-        # Update patterns (deduplicated)
-        new_patterns = reflection.get("patterns_detected", [])
-        store["patterns"] = list(
-            dict.fromkeys(store["patterns"] + new_patterns)
-        )[-_MAX_PATTERNS_PER_PROJECT:]
-
-        # Track success/failure
-        overall_ok = (
-            len(reflection.get("failure_factors", [])) == 0
-            and reflection.get("severity", "info") != "critical"
-        )
-        if overall_ok:
-            store["successes"] += 1
-        else:
-            store["failures"] += 1
-
-        # Cap total lessons
-        store["lessons"] = store["lessons"][-_MAX_LESSONS_PER_PROJECT:]
 
-        self._save_store(project_id, store)
-        logger.debug("Persisted %d new lessons for project %d", lessons_added, project_id)
+            record: dict[str, Any] = {
+                "seq": store["log_seq"] + 1,
+                "lessons": new_lessons,
+                "patterns": [str(p) for p in _as_list(reflection.get("patterns_detected"))],
+                "ok": overall_ok,
+            }
+            self._apply_record(store, record, index)
+            # Buffered until settings.llm_reflection_flush_every pile up, flush(),
+            # or interpreter exit — a hard kill loses the buffer, so deployments
+            # that can't afford that set it to 1
+            buffered = self._unflushed.setdefault(project_id, [])
+            buffered.append(record)
+        if len(buffered) >= settings.llm_reflection_flush_every:
+            self.flush(project_id)
+        logger.debug("Persisted {} new lessons for project {}", len(new_lessons), project_id)
@@ -14,17 +14,219 @@ from __future__ import annotations
 
 import asyncio
 import ast
+import functools
+import hashlib
+import importlib.util
+import io
+import itertools
 import json
+import os
 import re
-import subprocess
 import sys
+import threading
+from collections import deque
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from loguru import logger
 
-from app.models.database import Action, Project
+from app.utils.process_pool import get_process_pool
+
+if TYPE_CHECKING:
+    from app.models.database import Action, Project
+
+
+# ---------------------------------------------------------------------------
+# Tool-output patterns — compiled once; every parser below uses these
+# ---------------------------------------------------------------------------
+
+# "src/app.ts(12,5): error TS2322: Type 'string' is not assignable ..."
+# Multiline so one finditer over the whole output replaces a per-line loop.
+_TSC_DIAGNOSTIC_RE = re.compile(
+    r"^(.+?)\((\d+),(\d+)\):\s+error\s+TS\d+:.*$", re.MULTILINE
+)
+
+# Test-runner summaries are always printed last; only this much of the tail
+# is scanned for counts.
+_SUMMARY_TAIL_CHARS = 400
+# "5 passed, 2 failed, 1 skipped, 1 error in 3.21s"
+_PYTEST_COUNTS_RE = re.compile(r"(\d+)\s+(passed|failed|skipped|errors?)\b")
+# "TOTAL    120     12    90%"
+_COVERAGE_RE = re.compile(r"TOTAL\s+\d+\s+\d+\s+(\d+)%")
+# Jest: "Tests: 2 failed, 5 passed, 7 total"
+_JEST_TESTS_RE = re.compile(r"Tests:\s+(?:(\d+)\s+failed,?\s*)?(?:(\d+)\s+passed)?")
+# Vitest: "✓ 5 | ✗ 2"
+_VITEST_PASSED_RE = re.compile(r"✓\s+(\d+)")
+_VITEST_FAILED_RE = re.compile(r"✗\s+(\d+)|(\d+)\s+failed")
+
+
+# Python syntax results keyed by BLAKE2b of the source bytes, so re-verifying
+# unchanged files inside a planning loop skips ast.parse entirely.
+# Value: None (valid) or (lineno, message).
+_SYNTAX_CACHE: dict[str, tuple[int | None, str] | None] = {}
+_SYNTAX_CACHE_MAX = 2048
+
+
+# Test-runner stdout is streamed, not buffered: only the first bytes (error
+# context, and exactly what the report stores) and the last lines (summary,
+# coverage table) are kept.
+_STREAM_HEAD_BYTES = 8000
+_STREAM_TAIL_LINES = 2000
+# StreamReader line limit — pytest assertion diffs can exceed the 64 KiB default.
+_STREAM_LINE_LIMIT = 1 << 20
+
+
+async def _read_bounded(proc: asyncio.subprocess.Process) -> tuple[str, str]:
+    """
+    Drain a subprocess, keeping only a bounded head and tail of stdout.
+
+    Returns (stdout, stderr) decoded once at EOF; dropped middle lines are
+    replaced by a single marker line. Peak memory is constant in output size.
+    """
+    head = bytearray()
+    tail: deque[bytes] = deque(maxlen=_STREAM_TAIL_LINES)
+    dropped = 0
+
+    async def _drain_stdout() -> None:
+        nonlocal dropped
+        async for line in proc.stdout:
+            room = _STREAM_HEAD_BYTES - len(head)
+            if room > 0:
+                head.extend(line[:room])
+                if len(line) <= room:
+                    continue
+                line = line[room:]
+            if len(tail) == _STREAM_TAIL_LINES:
+                dropped += 1
+            tail.append(line)
+
+    _, stderr = await asyncio.gather(_drain_stdout(), proc.stderr.read())
+    await proc.wait()
+
+    if dropped:
+        sep = b"" if head.endswith(b"\n") else b"\n"
+        head.extend(sep + f"... [{dropped} lines truncated] ...\n".encode())
+    head.extend(b"".join(tail))
+    return (
+        head.decode("utf-8", errors="ignore"),
+        stderr.decode("utf-8", errors="ignore"),
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _read_package_json(path_str: str, mtime_ns: int) -> dict[str, Any] | None:
+    """
+    Parse package.json, cached by (path, mtime) so an edit invalidates it.
+    The returned dict is shared between callers — treat it as read-only.
+    """
+    try:
+        data = json.loads(Path(path_str).read_bytes())
+    except Exception:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _load_package_json(workspace: Path) -> dict[str, Any] | None:
+    """Return the workspace's parsed package.json, or None; a cache hit costs one stat."""
+    pkg = workspace / "package.json"
+    try:
+        mtime_ns = os.stat(pkg).st_mtime_ns
+    except OSError:
+        return None
+    return _read_package_json(str(pkg), mtime_ns)
+
+
+def _install_pidfd_child_watcher() -> None:
+    """
+    Reap subprocesses via pidfds instead of the default ThreadedChildWatcher,
+    which starts (and joins) one thread per spawned tool.
+
+    Only applies to the stock asyncio loop on Linux < 3.12 — 3.12+ already
+    uses pidfds internally and deprecates child watchers, and uvloop reaps
+    children itself.
+    """
+    if (
+        sys.platform != "linux"
+        or sys.version_info >= (3, 12)
+        or not hasattr(asyncio, "PidfdChildWatcher")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))   # needs kernel 5.3+
+        watcher = asyncio.PidfdChildWatcher()
+        asyncio.set_child_watcher(watcher)
+    except (OSError, AttributeError, NotImplementedError) as exc:
+        logger.debug("PidfdChildWatcher unavailable, keeping default: {}", exc)
+        return
+    # Loops created later are attached by the policy's set_event_loop();
+    # a loop that is already running has to be attached here.
+    try:
+        watcher.attach_loop(asyncio.get_running_loop())
+    except RuntimeError:
+        pass
+
+
+_install_pidfd_child_watcher()
+
+
+# Directories never searched for test files — dependency trees and build
+# output dominate walk time and never hold the project's own tests.
+_TEST_SCAN_SKIP_DIRS = frozenset({
+    "node_modules", ".git", ".venv", "venv", "__pycache__",
+    "dist", "build", ".tox", ".mypy_cache", ".pytest_cache", ".ruff_cache",
+})
+
+
+def _contains_test_file(root: Path) -> bool:
+    """Depth-first scandir walk that stops at the first test_*.py file."""
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in _TEST_SCAN_SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif entry.name.startswith("test_") and entry.name.endswith(".py"):
+                        return True
+        except OSError:
+            continue
+    return False
+
+
+# Upper bound on concurrently running external tools (tsc, node, ruff, eslint).
+# Unbounded fan-out on a small CI box thrashes the scheduler and page cache.
+_MAX_CONCURRENT_SUBPROCESSES = min(8, (os.cpu_count() or 1) * 2)
+
+
+# ast.parse holds the GIL, so larger batches of cache misses go to the shared
+# process pool; below this size the pool round-trip costs more than it saves.
+_PROCESS_POOL_MIN_FILES = 4
+
+
+def _parse_python(source: bytes, filename: str) -> tuple[int | None, str] | None:
+    """Parse Python source; return None if valid, else (lineno, message)."""
+    try:
+        ast.parse(source, filename=filename)
+        return None
+    except SyntaxError as exc:
+        return exc.lineno, exc.msg
+    except Exception:
+        return None
+
+
+def _cache_syntax_result(key: str, error: tuple[int | None, str] | None) -> None:
+    if len(_SYNTAX_CACHE) >= _SYNTAX_CACHE_MAX:
+        _SYNTAX_CACHE.clear()
+    _SYNTAX_CACHE[key] = error
+
+
+def _format_syntax_error(rel: str, error: tuple[int | None, str] | None) -> list[str]:
+    if error is None:
+        return []
+    return [f"Syntax error in {rel} (line {error[0]}): {error[1]}"]
 
 
 # ---------------------------------------------------------------------------
@@ -69,6 +271,25 @@ class VerificationReport:
     framework_used: str = ""
 
 
+# Report for an execution that changed no files: nothing to test or lint.
+# Copied per call (with fresh lists) since callers persist and may mutate it.
+_TRIVIAL_PASS_DICT: dict[str, Any] = {
+    "passed": True,
+    "tests_run": 0,
+    "tests_passed": 0,
+    "tests_failed": 0,
+    "tests_skipped": 0,
+    "test_output": "",
+    "syntax_valid": True,
+    "lint_valid": True,
+    "errors": [],
+    "warnings": [],
+    "coverage_percent": None,
+    "lint_details": [],
+    "framework_used": "",
+}
+
+
 # ---------------------------------------------------------------------------
 # Verifier
 # ---------------------------------------------------------------------------
@@ -88,8 +309,12 @@ class Verifier:
 
     DEFAULT_TIMEOUT = 300   # seconds
 
+    # pytest-cov availability, resolved lazily by _has_pytest_cov()
+    _HAS_PYTEST_COV: bool | None = None
+
     def __init__(self, timeout: int = DEFAULT_TIMEOUT) -> None:
         self.timeout = timeout
+        self._subprocess_sem = asyncio.Semaphore(_MAX_CONCURRENT_SUBPROCESSES)
 
     # -----------------------------------------------------------------------
     # Public API
@@ -102,13 +327,24 @@ class Verifier:
         execution_result: dict[str, Any],
     ) -> dict[str, Any]:
         """
-        Verify execution by running tests, linting and syntax checks.
+        Verify execution: syntax checks first (failing fast), then tests and
+        linting concurrently.
 
         Returns a dict representation of VerificationReport.
         """
-        logger.info("🔬 Verifying execution for action %s", action.id)
+        logger.info("🔬 Verifying execution for action {}", action.id)
+
+        # Fast path — no files touched, so skip test discovery and every subprocess
+        if not execution_result.get("files_created") and not execution_result.get("files_modified"):
+            logger.info("No files changed — skipping verification")
+            return {**_TRIVIAL_PASS_DICT, "errors": [], "warnings": [], "lint_details": []}
+
         workspace = Path(project.workspace_path)
 
+        changed_files = (
+            execution_result.get("files_created", [])
+            + execution_result.get("files_modified", [])
+        )
         all_errors: list[str] = []
         all_warnings: list[str] = []
         test_result = TestResult()
@@ -116,38 +352,25 @@ class Verifier:
         coverage: float | None = None
         framework_used = ""
 
-        # 1 — Run tests
-        if self._has_pytest(workspace):
-            framework_used = "pytest"
-            test_result = await self._run_pytest(workspace)
-        elif self._has_npm_test(workspace):
-            framework_used = "npm"
-            test_result = await self._run_npm_test(workspace)
+        # 1 — Syntax first: a syntax error makes the test run meaningless,
+        #     so bail out before spawning pytest/npm
+        syntax_ok, syntax_errors = await self._check_syntax_parallel(workspace, changed_files)
+        if not syntax_ok:
+            all_errors.extend(syntax_errors)
+            logger.info("Syntax errors found — skipping tests and lint")
         else:
-            logger.info("No test framework detected — skipping test run")
-            test_result.passed = True   # Don't fail when no tests exist
-
-        all_errors.extend(test_result.errors)
-
-        # 2 — Parse coverage from pytest output
-        if framework_used == "pytest":
-            coverage = self._parse_coverage(test_result.output)
-
-        # 3 — Syntax + lint checks in parallel
-        changed_files = (
-            execution_result.get("files_created", [])
-            + execution_result.get("files_modified", [])
-        )
-        if changed_files:
-            syntax_ok, syntax_errors = await self._check_syntax_parallel(workspace, changed_files)
-            lint_result = await self._run_linting(workspace, changed_files)
-
-            if not syntax_ok:
-                all_errors.extend(syntax_errors)
+            # 2 — Tests and lint are independent; run them concurrently
+            (test_result, framework_used), lint_result = await asyncio.gather(
+                self._run_tests(workspace),
+                self._run_linting(workspace, changed_files),
+            )
+            all_errors.extend(test_result.errors)
             all_errors.extend(lint_result.errors)
             all_warnings.extend(lint_result.warnings)
-        else:
-            syntax_ok = True
+
+            # 3 — Parse coverage from pytest output
+            if framework_used == "pytest":
+                coverage = self._parse_coverage(test_result.output)
 
         # 4 — Determine overall pass
         passed = (
@@ -163,7 +386,7 @@ class Verifier:
             tests_passed=test_result.tests_passed,
             tests_failed=test_result.tests_failed,
             tests_skipped=test_result.tests_skipped,
-            test_output=test_result.output[:8000],  # Truncate for storage
+            test_output=test_result.output[:_STREAM_HEAD_BYTES],  # Truncate for storage
             syntax_valid=syntax_ok,
             lint_valid=lint_result.valid,
             errors=all_errors[:20],
@@ -174,7 +397,7 @@ class Verifier:
         )
 
         logger.info(
-            "%s Verification — tests: %d/%d, syntax: %s, lint: %s",
+            "{} Verification — tests: {}/{}, syntax: {}, lint: {}",
             "✅" if report.passed else "❌",
             report.tests_passed,
             report.tests_run,
@@ -199,6 +422,15 @@ class Verifier:
             "framework_used": report.framework_used,
         }
 
+    async def _run_tests(self, workspace: Path) -> tuple[TestResult, str]:
+        """Run whichever test framework the workspace uses; returns (result, framework)."""
+        if self._has_pytest(workspace):
+            return await self._run_pytest(workspace), "pytest"
+        if self._has_npm_test(workspace):
+            return await self._run_npm_test(workspace), "npm"
+        logger.info("No test framework detected — skipping test run")
+        return TestResult(passed=True), ""   # Don't fail when no tests exist
+
     # -----------------------------------------------------------------------
     # Test framework detection
     # -----------------------------------------------------------------------
@@ -209,17 +441,14 @@ class Verifier:
             for f in ("pytest.ini", "pyproject.toml", "setup.cfg", "conftest.py")
         ):
             return True
-        return bool(list(workspace.rglob("test_*.py"))[:1])
+        return _contains_test_file(workspace)
 
     def _has_npm_test(self, workspace: Path) -> bool:
-        pkg = workspace / "package.json"
-        if not pkg.exists():
-            return False
-        try:
-            data = json.loads(pkg.read_text(encoding="utf-8"))
-            return "test" in data.get("scripts", {})
-        except Exception:
+        data = _load_package_json(workspace)
+        if data is None:
             return False
+        scripts = data.get("scripts")
+        return isinstance(scripts, dict) and "test" in scripts
 
     # -----------------------------------------------------------------------
     # pytest
@@ -237,14 +466,8 @@ class Verifier:
         ]
 
         # Optionally enable coverage
-        try:
-            subprocess.run(
-                [sys.executable, "-m", "pytest", "--co", "-q", "--co"],
-                capture_output=True, cwd=workspace, timeout=5,
-            )
+        if self._has_pytest_cov():
             cmd += ["--cov=.", "--cov-report=term-missing"]
-        except Exception:
-            pass  # pytest-cov not available — skip
 
         cmd.append(str(workspace))
 
@@ -254,16 +477,15 @@ class Verifier:
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
                 cwd=str(workspace),
+                limit=_STREAM_LINE_LIMIT,
             )
             try:
-                stdout, stderr = await asyncio.wait_for(proc.communicate(), self.timeout)
+                output, err_out = await asyncio.wait_for(_read_bounded(proc), self.timeout)
             except asyncio.TimeoutError:
                 proc.kill()
                 result.errors.append(f"pytest timed out after {self.timeout}s")
                 return result
 
-            output = stdout.decode("utf-8", errors="ignore")
-            err_out = stderr.decode("utf-8", errors="ignore")
             result.output = output
 
             counts = self._parse_pytest_summary(output)
@@ -285,14 +507,23 @@ class Verifier:
 
         return result
 
+    @classmethod
+    def _has_pytest_cov(cls) -> bool:
+        """
+        Whether pytest-cov is importable by the interpreter running the tests
+        (sys.executable). Checked once per process — no probe subprocess.
+        """
+        if cls._HAS_PYTEST_COV is None:
+            cls._HAS_PYTEST_COV = importlib.util.find_spec("pytest_cov") is not None
+        return cls._HAS_PYTEST_COV
+
     def _parse_pytest_summary(self, output: str) -> dict[str, int]:
-        """Parse pytest's last summary line."""
+        """Parse pytest's last summary line (single regex pass over the tail)."""
         counts = {"passed": 0, "failed": 0, "skipped": 0, "error": 0}
-        # "5 passed, 2 failed, 1 skipped in 3.21s"
-        for key in counts:
-            m = re.search(rf"(\d+)\s+{key}", output)
-            if m:
-                counts[key] = int(m.group(1))
+        # "5 passed, 2 failed, 1 skipped in 3.21s" — later matches win
+        for m in _PYTEST_COUNTS_RE.finditer(output[-_SUMMARY_TAIL_CHARS:]):
+            key = "error" if m.group(2).startswith("error") else m.group(2)
+            counts[key] = int(m.group(1))
         # Fallback: count individual PASSED/FAILED markers
         if counts["passed"] == 0 and counts["failed"] == 0:
             counts["passed"] = output.count(" PASSED")
@@ -301,7 +532,10 @@ class Verifier:
 
     def _parse_coverage(self, output: str) -> float | None:
         """Extract total coverage % from pytest-cov output."""
-        m = re.search(r"TOTAL\s+\d+\s+\d+\s+(\d+)%", output)
+        idx = output.rfind("TOTAL")
+        if idx == -1:
+            return None
+        m = _COVERAGE_RE.match(output, idx)
         return float(m.group(1)) if m else None
 
     # -----------------------------------------------------------------------
@@ -313,15 +547,10 @@ class Verifier:
         cmd = ["npm", "test", "--", "--passWithNoTests"]
 
         # Detect Vitest vs Jest for JSON reporter flag
-        pkg = workspace / "package.json"
-        is_vitest = False
-        if pkg.exists():
-            try:
-                data = json.loads(pkg.read_text(encoding="utf-8"))
-                all_deps = {**data.get("dependencies", {}), **data.get("devDependencies", {})}
-                is_vitest = "vitest" in all_deps
-            except Exception:
-                pass
+        data = _load_package_json(workspace) or {}
+        deps = data.get("dependencies") or {}
+        dev_deps = data.get("devDependencies") or {}
+        is_vitest = "vitest" in deps or "vitest" in dev_deps
 
         if is_vitest:
             cmd = ["npx", "vitest", "run", "--reporter=verbose", "--passWithNoTests"]
@@ -334,16 +563,15 @@ class Verifier:
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
                 cwd=str(workspace),
+                limit=_STREAM_LINE_LIMIT,
             )
             try:
-                stdout, stderr = await asyncio.wait_for(proc.communicate(), self.timeout)
+                output, err_out = await asyncio.wait_for(_read_bounded(proc), self.timeout)
             except asyncio.TimeoutError:
                 proc.kill()
                 result.errors.append(f"npm test timed out after {self.timeout}s")
                 return result
 
-            output = stdout.decode("utf-8", errors="ignore")
-            err_out = stderr.decode("utf-8", errors="ignore")
             result.output = output
 
             counts = self._parse_npm_summary(output + err_out)
@@ -363,14 +591,16 @@ class Verifier:
     def _parse_npm_summary(self, output: str) -> dict[str, int]:
         counts = {"passed": 0, "failed": 0}
         # Jest: "Tests: 2 failed, 5 passed, 7 total"
-        m = re.search(r"Tests:\s+(?:(\d+)\s+failed,?\s*)?(?:(\d+)\s+passed)?", output)
+        idx = output.rfind("Tests:")
+        m = _JEST_TESTS_RE.match(output, idx) if idx != -1 else None
         if m:
             counts["failed"] = int(m.group(1)) if m.group(1) else 0
             counts["passed"] = int(m.group(2)) if m.group(2) else 0
         # Vitest: "✓ 5 | ✗ 2"
         if counts["passed"] == 0 and counts["failed"] == 0:
-            passed = re.search(r"✓\s+(\d+)", output)
-            failed = re.search(r"✗\s+(\d+)|(\d+)\s+failed", output)
+            tail = output[-_SUMMARY_TAIL_CHARS:]
+            passed = _VITEST_PASSED_RE.search(tail)
+            failed = _VITEST_FAILED_RE.search(tail)
             if passed:
                 counts["passed"] = int(passed.group(1))
             if failed:
@@ -384,11 +614,24 @@ class Verifier:
     async def _check_syntax_parallel(
         self, workspace: Path, file_paths: list[str]
     ) -> tuple[bool, list[str]]:
-        """Check syntax of all changed files in parallel."""
+        """
+        Check syntax of all changed files in parallel.
+
+        TypeScript files are batched into a single tsc run — its start-up
+        cost dwarfs per-file checking, so one process beats N concurrent ones.
+        Python files are parsed as one batch (process pool when large).
+        """
+        py_files = [fp for fp in file_paths if Path(fp).suffix.lower() == ".py"]
+        ts_files = [fp for fp in file_paths if Path(fp).suffix.lower() in (".ts", ".tsx")]
         tasks = [
             self._check_file_syntax(workspace / fp, fp)
             for fp in file_paths
+            if Path(fp).suffix.lower() not in (".py", ".ts", ".tsx")
         ]
+        if py_files:
+            tasks.append(self._check_python_batch(workspace, py_files))
+        if ts_files:
+            tasks.append(self._check_ts_batch(workspace, ts_files))
         results = await asyncio.gather(*tasks, return_exceptions=True)
         errors: list[str] = []
         for r in results:
@@ -402,10 +645,6 @@ class Verifier:
         if not full_path.exists():
             return []
         suffix = full_path.suffix.lower()
-        if suffix == ".py":
-            return self._check_python_syntax(full_path, rel_path)
-        if suffix in (".ts", ".tsx"):
-            return await self._check_ts_syntax(full_path, rel_path)
         if suffix in (".js", ".jsx"):
             return await self._check_js_syntax(full_path, rel_path)
         if suffix == ".json":
@@ -414,42 +653,109 @@ class Verifier:
 
     def _check_python_syntax(self, path: Path, rel: str) -> list[str]:
         try:
-            source = path.read_text(encoding="utf-8")
-            ast.parse(source, filename=str(path))
-            return []
-        except SyntaxError as exc:
-            return [f"Syntax error in {rel} (line {exc.lineno}): {exc.msg}"]
+            source = path.read_bytes()
         except Exception:
             return []
 
-    async def _check_ts_syntax(self, path: Path, rel: str) -> list[str]:
-        """Run tsc --noEmit --allowJs on the file if tsc is available."""
+        key = hashlib.blake2b(source, digest_size=16).hexdigest()
+        if key in _SYNTAX_CACHE:
+            error = _SYNTAX_CACHE[key]
+        else:
+            error = _parse_python(source, str(path))
+            _cache_syntax_result(key, error)
+        return _format_syntax_error(rel, error)
+
+    async def _check_python_batch(self, workspace: Path, rel_paths: list[str]) -> list[str]:
+        """
+        Syntax-check Python files. Cache hits are answered inline; when enough
+        files miss, their ast.parse runs in the process pool so the work
+        spreads across cores instead of serialising on the GIL.
+        """
+        if len(rel_paths) < _PROCESS_POOL_MIN_FILES:
+            return [
+                err for rel in rel_paths
+                for err in self._check_python_syntax(workspace / rel, rel)
+            ]
+
+        errors: list[str] = []
+        misses: list[tuple[str, str, bytes, str]] = []   # (rel, key, source, filename)
+        for rel in rel_paths:
+            full_path = workspace / rel
+            try:
+                source = full_path.read_bytes()
+            except Exception:
+                continue
+            key = hashlib.blake2b(source, digest_size=16).hexdigest()
+            if key in _SYNTAX_CACHE:
+                errors.extend(_format_syntax_error(rel, _SYNTAX_CACHE[key]))
+            else:
+                misses.append((rel, key, source, str(full_path)))
+
+        if len(misses) >= _PROCESS_POOL_MIN_FILES:
+            loop = asyncio.get_running_loop()
+            pool = get_process_pool()
+            parsed = await asyncio.gather(*[
+                loop.run_in_executor(pool, _parse_python, source, filename)
+                for _, _, source, filename in misses
+            ])
+        else:
+            parsed = [_parse_python(source, filename) for _, _, source, filename in misses]
+
+        for (rel, key, _, _), error in zip(misses, parsed):
+            _cache_syntax_result(key, error)
+            errors.extend(_format_syntax_error(rel, error))
+        return errors
+
+    async def _check_ts_batch(self, workspace: Path, rel_paths: list[str]) -> list[str]:
+        """
+        Run one `tsc --noEmit --allowJs` over all TypeScript files (if tsc is
+        available) and attribute diagnostics back to each file.
+        """
+        existing = [rel for rel in rel_paths if (workspace / rel).exists()]
+        if not existing:
+            return []
         try:
-            proc = await asyncio.create_subprocess_exec(
-                "npx", "tsc", "--noEmit", "--allowJs",
-                "--target", "ES2022", "--moduleResolution", "node",
-                str(path),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            _, stderr = await asyncio.wait_for(proc.communicate(), timeout=15)
-            if proc.returncode != 0:
-                msg = stderr.decode("utf-8", errors="ignore").strip()
-                return [f"TypeScript error in {rel}: {msg[:300]}"]
+            async with self._subprocess_sem:
+                proc = await asyncio.create_subprocess_exec(
+                    "npx", "tsc", "--noEmit", "--allowJs",
+                    "--target", "ES2022", "--moduleResolution", "node",
+                    *existing,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=str(workspace),
+                )
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=30)
         except (FileNotFoundError, asyncio.TimeoutError):
-            pass  # tsc/npx not available or slow — skip
+            return []  # tsc/npx not available or slow — skip
         except Exception:
-            pass
-        return []
+            return []
+        if proc.returncode == 0:
+            return []
+
+        # tsc reports diagnostics on stdout as "path(line,col): error TSxxxx: msg"
+        output = (stdout + stderr).decode("utf-8", errors="ignore")
+        by_path = {Path(rel).as_posix(): rel for rel in existing}
+        per_file: dict[str, list[str]] = {}
+        for m in _TSC_DIAGNOSTIC_RE.finditer(output):
+            rel = by_path.get(Path(m.group(1)).as_posix(), m.group(1))
+            per_file.setdefault(rel, []).append(m.group(0).strip())
+
+        if not per_file:
+            return [f"TypeScript error: {output.strip()[:300]}"]
+        return [
+            f"TypeScript error in {rel}: {chr(10).join(lines)[:300]}"
+            for rel, lines in per_file.items()
+        ]
 
     async def _check_js_syntax(self, path: Path, rel: str) -> list[str]:
         try:
-            proc = await asyncio.create_subprocess_exec(
-                "node", "--check", str(path),
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            _, stderr = await asyncio.wait_for(proc.communicate(), timeout=5)
+            async with self._subprocess_sem:
+                proc = await asyncio.create_subprocess_exec(
+                    "node", "--check", str(path),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                _, stderr = await asyncio.wait_for(proc.communicate(), timeout=5)
             if proc.returncode != 0:
                 msg = stderr.decode("utf-8", errors="ignore").strip()
                 return [f"JS syntax error in {rel}: {msg[:200]}"]
@@ -459,7 +765,7 @@ class Verifier:
 
     def _check_json_syntax(self, path: Path, rel: str) -> list[str]:
         try:
-            json.loads(path.read_text(encoding="utf-8"))
+            json.loads(path.read_bytes())   # bytes in: no intermediate str
             return []
         except json.JSONDecodeError as exc:
             return [f"JSON error in {rel}: {exc}"]
@@ -503,28 +809,45 @@ class Verifier:
     async def _run_ruff(self, workspace: Path, py_files: list[str]) -> LintResult:
         result = LintResult(tool="ruff")
         paths = [str(workspace / fp) for fp in py_files]
+        # Keep ruff's incremental cache with the workspace so repeat
+        # verifications of the same project start warm.
+        env = {**os.environ, "RUFF_CACHE_DIR": str(workspace / ".ruff_cache")}
 
         try:
-            proc = await asyncio.create_subprocess_exec(
-                "ruff", "check", "--output-format=text", "--select=E,W,F,I", *paths,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=str(workspace),
-            )
-            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=20)
-            output = stdout.decode("utf-8", errors="ignore").strip()
+            async with self._subprocess_sem:
+                proc = await asyncio.create_subprocess_exec(
+                    "ruff", "check", "--output-format=json", "--select=E,W,F,I", *paths,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=str(workspace),
+                    env=env,
+                )
+                stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=20)
 
             if proc.returncode not in (0, 1):  # 1 = findings; non-1/0 = error
                 return result  # ruff crash — ignore
 
-            lines = [l for l in output.splitlines() if l.strip()]
-            # Separate errors (E/F) from warnings (W)
-            for line in lines[:30]:
-                if re.search(r"\s[EF]\d{3}", line):
+            try:
+                diagnostics = json.loads(stdout) if stdout.strip() else []
+            except json.JSONDecodeError:
+                return result
+
+            # Separate errors (E/F) from warnings (W). Entries without a code
+            # are parse failures, already reported by the syntax check.
+            for item in diagnostics[:30]:
+                code = item.get("code") or ""
+                if not code or code[0] not in "EFW":
+                    continue
+                loc = item.get("location") or {}
+                line = (
+                    f"{item.get('filename', '')}:{loc.get('row', 0)}:{loc.get('column', 0)}: "
+                    f"{code} {item.get('message', '')}"
+                )
+                if code[0] == "W":
+                    result.warnings.append(line)
+                else:
                     result.errors.append(line)
                     result.valid = False
-                elif re.search(r"\s[W]\d{3}", line):
-                    result.warnings.append(line)
 
         except FileNotFoundError:
             pass  # ruff not installed — skip silently
@@ -540,22 +863,30 @@ class Verifier:
 
         paths = [str(workspace / fp) for fp in js_files]
         try:
-            proc = await asyncio.create_subprocess_exec(
-                "npx", "eslint", "--format=compact", *paths,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=str(workspace),
-            )
-            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=30)
+            async with self._subprocess_sem:
+                proc = await asyncio.create_subprocess_exec(
+                    "npx", "eslint", "--format=compact", *paths,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=str(workspace),
+                )
+                stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=30)
             output = stdout.decode("utf-8", errors="ignore").strip()
 
+            # Lazily walk the lines and stop after 10 matches instead of
+            # materialising the whole split output.
             if "Error" in output:
                 result.valid = False
-                result.errors = [l for l in output.splitlines() if "Error" in l][:10]
+                result.errors = self._first_lines_with(output, "Error", 10)
             elif "Warning" in output:
-                result.warnings = [l for l in output.splitlines() if "Warning" in l][:10]
+                result.warnings = self._first_lines_with(output, "Warning", 10)
 
         except (FileNotFoundError, asyncio.TimeoutError):
             pass
 
         return result
+
+    @staticmethod
+    def _first_lines_with(output: str, needle: str, limit: int) -> list[str]:
+        lines = (line.rstrip("\n") for line in io.StringIO(output))
+        return list(itertools.islice((l for l in lines if needle in l), limit))
@@ -0,0 +1,41 @@
+"""
+Shared process pool for CPU-bound work (project analysis, syntax checks).
+
+One bounded pool for the whole process instead of one per module: each
+pool would otherwise hold cpu_count idle workers for the life of the server.
+Workers start via forkserver (spawn where unavailable) — forking a threaded,
+event-loop-driven server from inside asyncio.to_thread can copy a held lock
+into the child and deadlock it.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Half the cores, at most 4: the pool shares the box with the event loop,
+# the worker threads and the external tools the verifier runs
+_MAX_WORKERS = max(1, min(4, (os.cpu_count() or 1) // 2))
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _start_method() -> str:
+    methods = multiprocessing.get_all_start_methods()
+    return "forkserver" if "forkserver" in methods else "spawn"
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Lazily create the shared pool; safe to call from worker threads."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=_MAX_WORKERS,
+                    mp_context=multiprocessing.get_context(_start_method()),
+                )
+    return _pool
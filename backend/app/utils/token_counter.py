@@ -7,30 +7,51 @@ falls back to a character-based estimate (÷4) otherwise.
 
 from __future__ import annotations
 
+import functools
+import os
+import threading
+
 from loguru import logger
 
 _encoder = None
+_encoder_lock = threading.Lock()
 
 
 def _get_encoder():
-    """Lazy-load tiktoken encoder."""
+    """
+    Lazy-load tiktoken encoder.
+
+    Double-checked locking: only the first initialisation takes the lock,
+    so concurrent first calls load the BPE file once and steady-state calls
+    are lock-free.
+    """
     global _encoder
     if _encoder is None:
-        try:
-            import tiktoken
-            _encoder = tiktoken.get_encoding("cl100k_base")
-        except ImportError:
-            logger.debug("tiktoken not installed – using character estimate for token counting")
-            _encoder = False  # sentinel: tried but not available
+        with _encoder_lock:
+            if _encoder is None:
+                try:
+                    import tiktoken
+                    _encoder = tiktoken.get_encoding("cl100k_base")
+                except ImportError:
+                    logger.debug("tiktoken not installed – using character estimate for token counting")
+                    _encoder = False  # sentinel: tried but not available
+                except Exception as exc:
+                    # e.g. BPE file download failed (offline container)
+                    logger.debug("tiktoken encoding unavailable ({}) – using character estimate", exc)
+                    _encoder = False
     return _encoder
 
 
+@functools.lru_cache(maxsize=256)
 def count_tokens(text: str) -> int:
     """
     Count tokens in text.
 
     Uses cl100k_base (Claude/GPT-4 compatible) when tiktoken is installed,
     otherwise estimates as len(text) // 4.
+
+    Results are memoised: system prompts and project overviews are counted
+    repeatedly with identical content.
     """
     enc = _get_encoder()
     if enc:
@@ -42,17 +63,44 @@ def count_tokens(text: str) -> int:
     return max(1, len(text) // 4)
 
 
+def count_tokens_batch(texts: list[str]) -> list[int]:
+    """
+    Count tokens for many texts in one call.
+
+    Uses tiktoken's encode_batch, which encodes across threads without the
+    GIL; falls back to the len(text) // 4 estimate per text.
+    """
+    enc = _get_encoder()
+    if enc:
+        try:
+            return [len(t) for t in enc.encode_batch(texts, num_threads=os.cpu_count() or 1)]
+        except Exception:
+            pass
+    return [max(1, len(text) // 4) for text in texts]
+
+
+# Prices as of 2025-02 (claude.ai pricing page).
+# model: (input $/M tokens, output $/M tokens)
+_PRICING_PER_MILLION: dict[str, tuple[float, float]] = {
+    "claude-sonnet-4-20250514": (3.0, 15.0),
+    "claude-opus-4-20250514": (15.0, 75.0),
+    "claude-haiku-4-5-20251001": (0.25, 1.25),
+}
+_DEFAULT_PRICING = (3.0, 15.0)
+
+# Per-token rates precomputed once so estimate_cost is a single multiply-add.
+_PRICING_PER_TOKEN: dict[str, tuple[float, float]] = {
+    model: (inp / 1_000_000, out / 1_000_000)
+    for model, (inp, out) in _PRICING_PER_MILLION.items()
+}
+_DEFAULT_PER_TOKEN = (_DEFAULT_PRICING[0] / 1_000_000, _DEFAULT_PRICING[1] / 1_000_000)
+
+
 def estimate_cost(input_tokens: int, output_tokens: int, model: str = "claude-sonnet-4-20250514") -> float:
     """
     Estimate API cost in USD.
 
-    Prices as of 2025-02 (claude.ai pricing page).
+    Unknown models are priced as Sonnet.
     """
-    pricing: dict[str, tuple[float, float]] = {
-        # model: (input $/M tokens, output $/M tokens)
-        "claude-sonnet-4-20250514": (3.0, 15.0),
-        "claude-opus-4-20250514": (15.0, 75.0),
-        "claude-haiku-4-5-20251001": (0.25, 1.25),
-    }
-    rates = pricing.get(model, (3.0, 15.0))
-    return (input_tokens / 1_000_000 * rates[0]) + (output_tokens / 1_000_000 * rates[1])
+    in_rate, out_rate = _PRICING_PER_TOKEN.get(model, _DEFAULT_PER_TOKEN)
+    return input_tokens * in_rate + output_tokens * out_rate
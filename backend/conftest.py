@@ -1,16 +1,54 @@
 """
 Pytest configuration and shared fixtures.
+
+Heavy objects (the FastAPI app, the Verifier stack) are imported inside their
+fixtures so unit tests that don't use them never pay for the import.
 """
 
 from __future__ import annotations
 
 import asyncio
+import copy
+import os
+import shutil
+import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import pytest
-from fastapi.testclient import TestClient
 
-from app.main import app
+if TYPE_CHECKING:
+    from fastapi.testclient import TestClient
+
+    from app.services.diff_engine import DiffEngine, FileDiff
+    from app.services.verifier import Verifier
+
+
+# ── Temp storage ──────────────────────────────────────────────────────────────
+
+_SHM_ROOT = Path("/dev/shm")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """
+    Put tmp_path / tmp_path_factory on tmpfs when available, so workspace
+    tests never touch the disk. An explicit --basetemp always wins; xdist
+    workers inherit the controller's choice.
+    """
+    if config.option.basetemp or hasattr(config, "workerinput"):
+        return
+    if sys.platform != "linux" or not (_SHM_ROOT.is_dir() and os.access(_SHM_ROOT, os.W_OK)):
+        return
+    basetemp = _SHM_ROOT / f"pytest-{os.getpid()}"
+    config.option.basetemp = str(basetemp)
+    config._shm_basetemp = basetemp
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    # tmpfs is RAM — don't leave the run's files behind
+    basetemp = getattr(config, "_shm_basetemp", None)
+    if basetemp is not None:
+        shutil.rmtree(basetemp, ignore_errors=True)
 
 
 # ── Event loop ────────────────────────────────────────────────────────────────
@@ -25,12 +63,29 @@ def event_loop():
 
 # ── App test client ───────────────────────────────────────────────────────────
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def client() -> TestClient:
     """FastAPI test client (no real DB – routes return stubs)."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
     return TestClient(app)
 
 
+# ── Verifier ──────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def verifier() -> Verifier:
+    """
+    Fresh Verifier per test: it owns an asyncio.Semaphore, which binds to the
+    first event loop that contends on it, and each test runs its own loop.
+    """
+    from app.services.verifier import Verifier
+
+    return Verifier(timeout=30)
+
+
 # ── Workspace ─────────────────────────────────────────────────────────────────
 
 @pytest.fixture
@@ -39,3 +94,44 @@ def workspace(tmp_path: Path) -> Path:
     ws = tmp_path / "workspace"
     ws.mkdir()
     return ws
+
+
+def _write_many(root: Path, files: dict[str, bytes]) -> None:
+    """Write pre-encoded files with raw os calls — no per-file open()/encode() wrappers."""
+    for name, data in files.items():
+        fd = os.open(root / name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+
+@pytest.fixture
+def write_many():
+    """Seed precondition files: write_many(root, {"a.py": b"..."})."""
+    return _write_many
+
+
+# CREATE diffs never read the workspace, so one prototype per
+# (path, content) serves every engine in the session.
+_CREATE_DIFF_PROTOS: dict[tuple[str, str], FileDiff] = {}
+
+
+@pytest.fixture
+def create_diff_cached(engine: DiffEngine):
+    """
+    Memoised engine.create_diff(path, content, CREATE) for setup-only diffs.
+    Returns a deep copy each call, so applying or rolling back is safe.
+    """
+    from app.services.diff_engine import DiffOperation
+
+    def _make(file_path: str, content: str) -> FileDiff:
+        key = (file_path, content)
+        proto = _CREATE_DIFF_PROTOS.get(key)
+        if proto is None:
+            proto = _CREATE_DIFF_PROTOS[key] = engine.create_diff(
+                file_path, content, DiffOperation.CREATE
+            )
+        return copy.deepcopy(proto)
+
+    return _make
@@ -0,0 +1,237 @@
+"""
+Unit tests for CodeAnalyzer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from app.utils.code_analyzer import CodeAnalyzer, FileInfo
+
+
+@pytest.fixture(scope="module")
+def analyzer() -> CodeAnalyzer:
+    return CodeAnalyzer()
+
+
+# ── _extract_python_symbols ───────────────────────────────────────────────────
+
+class TestExtractPythonSymbols:
+    def test_imports_in_source_order(self, analyzer: CodeAnalyzer) -> None:
+        src = "import os\nimport json\nfrom typing import (\n    Any,\n    Optional,\n)\n"
+        imports, _ = analyzer._extract_python_symbols(src)
+        assert imports == ["os", "json", "typing"]
+
+    def test_skips_relative_and_private(self, analyzer: CodeAnalyzer) -> None:
+        src = "from __future__ import annotations\nfrom . import x\nfrom .mod import y\nimport a.b.c\n"
+        imports, _ = analyzer._extract_python_symbols(src)
+        assert imports == ["a"]
+
+    def test_ignores_nested_and_string_imports(self, analyzer: CodeAnalyzer) -> None:
+        src = 'def f():\n    import lazy\n\nDOC = """\nimport fake\n"""\n'
+        imports, exports = analyzer._extract_python_symbols(src)
+        assert imports == []
+        assert exports == ["f"]
+
+    def test_exports_top_level_defs_and_all_tuple(self, analyzer: CodeAnalyzer) -> None:
+        src = (
+            "__all__ = ('Public', 'helper')\n"
+            "class Model:\n    def method(self): ...\n"
+            "async def run(): ...\n"
+        )
+        _, exports = analyzer._extract_python_symbols(src)
+        assert exports == ["Public", "helper", "Model", "run"]
+
+    def test_syntax_error_falls_back_to_regex(self, analyzer: CodeAnalyzer) -> None:
+        src = "import os\nfrom pathlib import Path\ndef broken(:\n"
+        imports, exports = analyzer._extract_python_symbols(src)
+        assert imports == ["os", "pathlib"]
+        assert exports == ["broken"]
+
+
+# ── _walk_workspace ───────────────────────────────────────────────────────────
+
+class TestWalkWorkspace:
+    def test_prunes_ignored_dirs(self, analyzer: CodeAnalyzer, tmp_path: Path) -> None:
+        for rel in ("src/app.py", "node_modules/pkg/index.js",
+                    "mylib.egg-info/PKG-INFO.md", "src/sub/util.py", "empty/.keep"):
+            (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / rel).write_text("x\n")
+
+        files, dirs = analyzer._walk_workspace(tmp_path)
+        assert sorted(str(f.relative_to(tmp_path)) for f in files) == [
+            "src/app.py", "src/sub/util.py",
+        ]
+        assert dirs == ["empty", "src", "src/sub"]
+
+
+# ── _analyze_file ─────────────────────────────────────────────────────────────
+
+class TestAnalyzeFile:
+    def test_empty_file_not_opened(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        analyzer = CodeAnalyzer()
+        monkeypatch.setattr(analyzer, "_read_head", lambda fp: pytest.fail("opened empty file"))
+        (tmp_path / "__init__.py").touch()
+
+        fi, content = analyzer._analyze_file(tmp_path / "__init__.py", tmp_path, keep_content=True)
+        assert (fi.path, fi.size, fi.lines, fi.imports, fi.complexity_score) == (
+            "__init__.py", 0, 1, [], 0
+        )
+        assert content == ""
+
+    def test_non_source_file_counts_lines_only(self, analyzer: CodeAnalyzer, tmp_path: Path) -> None:
+        (tmp_path / "notes.md").write_text("import os\nif x:\n")
+        fi, content = analyzer._analyze_file(tmp_path / "notes.md", tmp_path, keep_content=True)
+        assert (fi.language, fi.lines, fi.imports, fi.complexity_score) == ("markdown", 3, [], 0)
+        assert content is None
+
+
+# ── _roll_up_files ────────────────────────────────────────────────────────────
+
+def _fi(path: str, **kw) -> FileInfo:
+    return FileInfo(path=path, name=path.rsplit("/", 1)[-1], extension=".py",
+                    size=1, lines=1, language="python", **kw)
+
+
+class TestRollUpFiles:
+    def test_path_categories(self, analyzer: CodeAnalyzer) -> None:
+        cats = analyzer._roll_up_files([
+            _fi("app/services/user_model.py"),
+            _fi("app\\api\\routes.py"),
+            _fi("models.py"),
+            _fi("tests/services/test_x.py", is_test=True),
+        ]).categories
+        assert cats["services"] == ["app/services/user_model.py"]
+        assert cats["models"] == []
+        assert cats["routes"] == ["app\\api\\routes.py"]
+        assert cats["test"] == ["tests/services/test_x.py"]
+        assert len(cats["source"]) == 3
+
+    def test_totals_and_languages(self, analyzer: CodeAnalyzer) -> None:
+        rollup = analyzer._roll_up_files([
+            _fi("a.py", complexity_score=3, imports=["os"], is_entry_point=True),
+            _fi("b.py", complexity_score=1, has_type_hints=True),
+        ])
+        assert (rollup.total_lines, rollup.total_complexity) == (2, 4)
+        assert rollup.languages == {"python": 2}
+        assert rollup.entry_points == ["a.py"]
+        assert rollup.import_graph == {"a.py": ["os"]}
+        assert rollup.has_type_hints
+
+
+# ── Persistent file cache ─────────────────────────────────────────────────────
+
+class TestFileCache:
+    @pytest.fixture
+    def project(self, tmp_path: Path) -> Path:
+        root = tmp_path / "proj"
+        root.mkdir()
+        (root / "app.py").write_text("import os\n\ndef main():\n    pass\n")
+        (root / "util.py").write_text("import json\n")
+        return root
+
+    def _analyze(self, analyzer: CodeAnalyzer, root: Path) -> dict:
+        return asyncio.run(analyzer.analyze_project_async(str(root)))
+
+    def test_second_run_served_from_cache(
+        self, project: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        cache_path = tmp_path / "cache" / "analyzer.json"
+        first = self._analyze(CodeAnalyzer(cache_path=cache_path), project)
+        assert cache_path.exists()
+
+        analyzer = CodeAnalyzer(cache_path=cache_path)
+        monkeypatch.setattr(analyzer, "_analyze_file", lambda *a: pytest.fail("cache miss"))
+        assert self._analyze(analyzer, project)["files"] == first["files"]
+
+    def test_changed_file_reanalysed(self, project: Path, tmp_path: Path) -> None:
+        cache_path = tmp_path / "analyzer.json"
+        self._analyze(CodeAnalyzer(cache_path=cache_path), project)
+
+        app = project / "app.py"
+        app.write_text("import sys\nimport os\n")
+        st = app.stat()
+        os.utime(app, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        files = {f["path"]: f for f in self._analyze(CodeAnalyzer(cache_path=cache_path), project)["files"]}
+        assert files["app.py"]["imports"] == ["sys", "os"]
+        assert files["util.py"]["imports"] == ["json"]
+
+    def test_corrupt_cache_ignored(self, project: Path, tmp_path: Path) -> None:
+        cache_path = tmp_path / "analyzer.json"
+        cache_path.write_text("{not json")
+        result = self._analyze(CodeAnalyzer(cache_path=cache_path), project)
+        assert result["total_files"] == 2
+
+    def test_concurrent_saves_keep_every_workspace(self, tmp_path: Path) -> None:
+        roots = []
+        for i in range(6):
+            root = tmp_path / f"ws{i}"
+            root.mkdir()
+            (root / "mod.py").write_text(f"import os\nVALUE = {i}\n")
+            roots.append(root)
+        cache_path = tmp_path / "cache" / "analyzer.json"
+        analyzer = CodeAnalyzer(cache_path=cache_path)
+        with ThreadPoolExecutor(max_workers=len(roots)) as pool:
+            results = list(pool.map(lambda r: analyzer.analyze_project(str(r)), roots))
+        assert all(r["total_files"] == 1 for r in results)
+        cached = json.loads(cache_path.read_bytes())["workspaces"]
+        assert set(cached) == {str(r.resolve()) for r in roots}
+        assert [p.name for p in cache_path.parent.iterdir()] == ["analyzer.json"]
+
+    def test_cache_off_by_default(
+        self, project: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        home = tmp_path / "home"
+        monkeypatch.setenv("HOME", str(home))
+        monkeypatch.setenv("XDG_CACHE_HOME", str(home / ".cache"))
+        monkeypatch.chdir(tmp_path)
+        before = sorted(tmp_path.rglob("*"))
+        assert self._analyze(CodeAnalyzer(), project)["total_files"] == 2
+        assert sorted(tmp_path.rglob("*")) == before
+
+
+# ── _scan_security ────────────────────────────────────────────────────────────
+
+class TestScanSecurity:
+    def _scan(self, analyzer: CodeAnalyzer, tmp_path: Path, text: str) -> list:
+        return analyzer._scan_security({tmp_path / "mod.py": text}, tmp_path)
+
+    def test_line_numbers_and_snippets(self, analyzer: CodeAnalyzer, tmp_path: Path) -> None:
+        text = "import os\n\nos.system('ls')\nx = 1\n  y = eval(z)  \n"
+        findings = self._scan(analyzer, tmp_path, text)
+        assert [(f.line_number, f.category, f.snippet) for f in findings] == [
+            (3, "shell_injection", "os.system('ls')"),
+            (5, "code_injection", "y = eval(z)"),
+        ]
+
+    def test_one_finding_per_line_first_pattern_wins(
+        self, analyzer: CodeAnalyzer, tmp_path: Path
+    ) -> None:
+        findings = self._scan(analyzer, tmp_path, "eval(x); password = 'hunter22'\n")
+        assert [f.category for f in findings] == ["hardcoded_secret"]
+
+    def test_match_spanning_lines_does_not_hide_next_line(
+        self, analyzer: CodeAnalyzer, tmp_path: Path
+    ) -> None:
+        text = "password =\n'abcd'; eval(x)\n"
+        findings = self._scan(analyzer, tmp_path, text)
+        assert [(f.line_number, f.category) for f in findings] == [(2, "code_injection")]
+
+    def test_clean_file(self, analyzer: CodeAnalyzer, tmp_path: Path) -> None:
+        assert self._scan(analyzer, tmp_path, "def f(a, b):\n    return a + b\n") == []
+
+    def test_pool_matches_inline(self, analyzer: CodeAnalyzer, tmp_path: Path) -> None:
+        contents = {
+            tmp_path / f"m{i}.py": f"x = {i}\n" + ("eval(y)\n" if i % 3 == 0 else "")
+            for i in range(20)
+        }
+        inline = analyzer._scan_security(contents, tmp_path)
+        assert len(inline) == 7
+        assert analyzer._scan_security(contents, tmp_path, use_pool=True) == inline
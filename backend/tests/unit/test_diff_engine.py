@@ -4,17 +4,28 @@ Unit tests for DiffEngine.
 
 from __future__ import annotations
 
-import tempfile
+import dataclasses
+import hashlib
+import os
+import re
 from pathlib import Path
+from typing import Any
 
 import pytest
+from hypothesis import HealthCheck, given, settings
+from hypothesis import strategies as st
 
+from app.services import diff_engine
 from app.services.diff_engine import DiffEngine, DiffOperation, FileDiff
 
 
 @pytest.fixture
-def tmp_workspace(tmp_path: Path) -> Path:
-    return tmp_path
+def tmp_workspace(tmp_path_factory: pytest.TempPathFactory, request: pytest.FixtureRequest) -> Path:
+    # One subdir per test under the session's single base tempdir; the xdist
+    # worker id keeps parallel workers from ever sharing a name
+    worker_id = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    name = re.sub(r"\W", "_", request.node.name)[:40]
+    return tmp_path_factory.mktemp(f"{name}_{worker_id}")
 
 
 @pytest.fixture
@@ -22,6 +33,43 @@ def engine(tmp_workspace: Path) -> DiffEngine:
     return DiffEngine(workspace_root=str(tmp_workspace))
 
 
+@pytest.fixture
+def deep_dirs(tmp_workspace: Path) -> Path:
+    """Pre-created deep/nested directory chain inside the workspace."""
+    d = tmp_workspace / "deep" / "nested"
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+@pytest.fixture(scope="session")
+def shared_engine(tmp_path_factory: pytest.TempPathFactory) -> DiffEngine:
+    """Engine for tests that never write to the workspace."""
+    return DiffEngine(workspace_root=str(tmp_path_factory.mktemp("shared_ro")))
+
+
+# Seed contents, encoded once at import
+_CONTENTS: dict[str, bytes] = {
+    "x0": b"x = 0\n",
+    "x1": b"x = 1\n",
+    "pass": b"pass",
+    "pass_nl": b"pass\n",
+    "original": b"original content\n",
+}
+
+
+_PROTO = FileDiff(operation=DiffOperation.CREATE, file_path="", new_content="")
+
+
+def _diff(operation: DiffOperation, file_path: str, **overrides: Any) -> FileDiff:
+    """FileDiff built from a shared prototype; line_changes is never shared."""
+    overrides.setdefault("line_changes", {"additions": 0, "deletions": 0})
+    return dataclasses.replace(_PROTO, operation=operation, file_path=file_path, **overrides)
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
 # ── create_diff ───────────────────────────────────────────────────────────────
 
 class TestCreateDiff:
@@ -34,7 +82,7 @@ class TestCreateDiff:
         assert diff.checksum_after is not None
 
     def test_modify_existing_file(self, engine: DiffEngine, tmp_workspace: Path) -> None:
-        (tmp_workspace / "hello.py").write_text("x = 1\n")
+        (tmp_workspace / "hello.py").write_bytes(_CONTENTS["x1"])
         diff = engine.create_diff("hello.py", "x = 2\n", DiffOperation.MODIFY)
         assert diff.operation == DiffOperation.MODIFY
         assert diff.original_content == "x = 1\n"
@@ -44,8 +92,8 @@ class TestCreateDiff:
         assert diff.checksum_after is not None
         assert diff.checksum_before != diff.checksum_after
 
-    def test_create_has_no_unified_diff(self, engine: DiffEngine) -> None:
-        diff = engine.create_diff("new.py", "pass\n", DiffOperation.CREATE)
+    def test_create_has_no_unified_diff(self, shared_engine: DiffEngine) -> None:
+        diff = shared_engine.create_diff("new.py", "pass\n", DiffOperation.CREATE)
         assert diff.unified_diff is None  # No original to diff against
 
     def test_modify_nonexistent_file_becomes_create(self, engine: DiffEngine) -> None:
@@ -64,31 +112,39 @@ class TestValidateDiff:
         assert warnings == []
 
     def test_create_existing_file_invalid(self, engine: DiffEngine, tmp_workspace: Path) -> None:
-        (tmp_workspace / "exists.py").write_text("pass")
-        diff = FileDiff(
-            operation=DiffOperation.CREATE,
-            file_path="exists.py",
-            new_content="pass",
-        )
+        (tmp_workspace / "exists.py").write_bytes(_CONTENTS["pass"])
+        diff = _diff(DiffOperation.CREATE, "exists.py", new_content="pass")
         valid, warnings = engine.validate_diff(diff)
         assert valid is False
-        assert any("already exists" in w for w in warnings)
+        assert "file_already_exists" in {w.code for w in warnings}
 
     def test_modify_missing_file_invalid(self, engine: DiffEngine) -> None:
-        diff = FileDiff(
-            operation=DiffOperation.MODIFY,
-            file_path="missing.py",
-            original_content="x=1",
-            new_content="x=2",
-        )
+        diff = _diff(DiffOperation.MODIFY, "missing.py", original_content="x=1", new_content="x=2")
+        valid, warnings = engine.validate_diff(diff)
+        assert valid is False
+
+    def test_oversized_file_invalid(self, engine: DiffEngine, monkeypatch: pytest.MonkeyPatch) -> None:
+        # Shrink the limit rather than allocating a real 6 MB payload
+        monkeypatch.setattr(diff_engine, "_MAX_FILE_SIZE_BYTES", 16)
+        diff = _diff(DiffOperation.CREATE, "big.py", new_content="x" * 17)
         valid, warnings = engine.validate_diff(diff)
         assert valid is False
+        assert "exceeds_size_limit" in {w.code for w in warnings}
 
-    def test_oversized_file_invalid(self, engine: DiffEngine) -> None:
+    def test_oversized_file_stat_path(self, engine: DiffEngine, tmp_workspace: Path) -> None:
+        # Sparse file: 6 MB st_size, no bytes actually written
+        with open(tmp_workspace / "huge.py", "wb") as f:
+            f.truncate(6 * 1024 * 1024)
+        diff = _diff(DiffOperation.MODIFY, "huge.py", new_content="x")
+        valid, warnings = engine.validate_diff(diff)
+        assert valid is False
+        assert "exceeds_size_limit" in {w.code for w in warnings}
+
+    @pytest.mark.slow
+    def test_oversized_file_invalid_real_limit(self, engine: DiffEngine) -> None:
         big_content = "x" * (6 * 1024 * 1024)  # 6 MB
-        diff = FileDiff(
-            operation=DiffOperation.CREATE,
-            file_path="big.py",
+        diff = _diff(
+            DiffOperation.CREATE, "big.py",
             new_content=big_content,
             line_changes={"additions": 1, "deletions": 0},
         )
@@ -100,86 +156,143 @@ class TestValidateDiff:
 # ── apply_diff ────────────────────────────────────────────────────────────────
 
 class TestApplyDiff:
-    def test_apply_create(self, engine: DiffEngine, tmp_workspace: Path) -> None:
-        diff = engine.create_diff("new_file.py", "x = 42\n", DiffOperation.CREATE)
+    @pytest.mark.parametrize(
+        ("operation", "seed_key", "new_content"),
+        [
+            (DiffOperation.CREATE, None, "x = 42\n"),
+            (DiffOperation.MODIFY, "x1", "x = 99\n"),
+            (DiffOperation.DELETE, "pass_nl", ""),
+        ],
+        ids=["create", "modify", "delete"],
+    )
+    def test_apply(
+        self,
+        engine: DiffEngine,
+        tmp_workspace: Path,
+        operation: DiffOperation,
+        seed_key: str | None,
+        new_content: str,
+    ) -> None:
+        p = tmp_workspace / "target.py"
+        if seed_key is not None:
+            p.write_bytes(_CONTENTS[seed_key])
+        # apply_diff is under test, not create_diff — build the diff directly
+        diff = _diff(operation, "target.py", new_content=new_content)
         engine.apply_diff(diff)
-        assert (tmp_workspace / "new_file.py").read_text() == "x = 42\n"
         assert diff.applied is True
-
-    def test_apply_modify(self, engine: DiffEngine, tmp_workspace: Path) -> None:
-        (tmp_workspace / "target.py").write_text("x = 1\n")
-        diff = engine.create_diff("target.py", "x = 99\n", DiffOperation.MODIFY)
+        if operation == DiffOperation.DELETE:
+            assert not p.exists()
+        else:
+            assert p.read_bytes() == new_content.encode()
+        if operation == DiffOperation.MODIFY:
+            assert diff.backup_path is not None
+
+    @pytest.mark.parametrize("size", [1024, 1024 * 1024], ids=["1KiB", "1MiB"])
+    def test_apply_content_checksum(self, engine: DiffEngine, tmp_workspace: Path, size: int) -> None:
+        content = "x" * (size - 1) + "\n"
+        diff = engine.create_diff("sized.py", content, DiffOperation.CREATE)
         engine.apply_diff(diff)
-        assert (tmp_workspace / "target.py").read_text() == "x = 99\n"
-        assert diff.backup_path is not None
-
-    def test_apply_delete(self, engine: DiffEngine, tmp_workspace: Path) -> None:
-        p = tmp_workspace / "del_me.py"
-        p.write_text("pass\n")
-        diff = engine.create_diff("del_me.py", "", DiffOperation.DELETE)
-        engine.apply_diff(diff)
-        assert not p.exists()
+        # Hash the raw bytes — no decode of the written file
+        assert _sha256((tmp_workspace / "sized.py").read_bytes()) == diff.checksum_after
+
+    @pytest.mark.durability
+    def test_apply_with_fsync(self, tmp_workspace: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        synced: list[int] = []
+        real_fsync = os.fsync
+        monkeypatch.setattr(diff_engine.os, "fsync", lambda fd: (synced.append(fd), real_fsync(fd)))
+        durable = DiffEngine(workspace_root=str(tmp_workspace), fsync=True)
+        durable.apply_diff(_diff(DiffOperation.CREATE, "durable.py", new_content="pass\n"))
+        assert (tmp_workspace / "durable.py").read_bytes() == b"pass\n"
+        assert len(synced) == 1
 
     def test_dry_run_does_not_write(self, engine: DiffEngine, tmp_workspace: Path) -> None:
-        diff = engine.create_diff("dry.py", "pass\n", DiffOperation.CREATE)
+        diff = _diff(DiffOperation.CREATE, "dry.py", new_content="pass\n")
         engine.apply_diff(diff, dry_run=True)
         assert not (tmp_workspace / "dry.py").exists()
         assert diff.applied is False
 
-    def test_creates_parent_dirs(self, engine: DiffEngine, tmp_workspace: Path) -> None:
-        diff = engine.create_diff("deep/nested/file.py", "pass\n", DiffOperation.CREATE)
+    def test_creates_parent_dirs_cold(self, engine: DiffEngine, tmp_workspace: Path) -> None:
+        diff = _diff(DiffOperation.CREATE, "deep/nested/file.py", new_content="pass\n")
         engine.apply_diff(diff)
         assert (tmp_workspace / "deep/nested/file.py").exists()
 
+    def test_apply_into_existing_deep_dirs(self, engine: DiffEngine, deep_dirs: Path) -> None:
+        # Parents already exist, so the engine's mkdir is an exist_ok no-op
+        diff = _diff(DiffOperation.CREATE, "deep/nested/file.py", new_content="pass\n")
+        engine.apply_diff(diff)
+        assert (deep_dirs / "file.py").exists()
+
 
 # ── rollback ──────────────────────────────────────────────────────────────────
 
 class TestRollback:
-    def test_rollback_create(self, engine: DiffEngine, tmp_workspace: Path) -> None:
-        diff = engine.create_diff("rollback_me.py", "pass\n", DiffOperation.CREATE)
+    @settings(
+        max_examples=20,
+        deadline=None,
+        suppress_health_check=[HealthCheck.function_scoped_fixture],
+    )
+    @given(
+        operation=st.sampled_from(list(DiffOperation)),
+        content=st.text(max_size=64),
+    )
+    def test_rollback_round_trip(
+        self,
+        engine: DiffEngine,
+        tmp_workspace: Path,
+        operation: DiffOperation,
+        content: str,
+    ) -> None:
+        # One workspace for every example; each starts from an explicit state
+        p = tmp_workspace / "round_trip.py"
+        seed = _CONTENTS["original"]
+        if operation == DiffOperation.CREATE:
+            p.unlink(missing_ok=True)
+        else:
+            p.write_bytes(seed)
+
+        new_content = "" if operation == DiffOperation.DELETE else content
+        diff = engine.create_diff("round_trip.py", new_content, operation)
         engine.apply_diff(diff)
-        assert (tmp_workspace / "rollback_me.py").exists()
-        engine.rollback_diff(diff)
-        assert not (tmp_workspace / "rollback_me.py").exists()
-
-    def test_rollback_modify(self, engine: DiffEngine, tmp_workspace: Path) -> None:
-        p = tmp_workspace / "original.py"
-        p.write_text("original content\n")
-        diff = engine.create_diff("original.py", "modified content\n", DiffOperation.MODIFY)
-        engine.apply_diff(diff)
-        assert p.read_text() == "modified content\n"
-        engine.rollback_diff(diff)
-        assert p.read_text() == "original content\n"
-
-    def test_rollback_unapplied_diff_noop(self, engine: DiffEngine) -> None:
-        diff = FileDiff(
-            operation=DiffOperation.CREATE,
-            file_path="never_applied.py",
-            new_content="pass",
-        )
-        result = engine.rollback_diff(diff)
+        assert engine.rollback_diff(diff) is True
+
+        if operation == DiffOperation.CREATE:
+            assert not p.exists()
+        else:
+            assert p.read_bytes() == seed
+
+    def test_rollback_unapplied_diff_noop(self, shared_engine: DiffEngine) -> None:
+        diff = _diff(DiffOperation.CREATE, "never_applied.py", new_content="pass")
+        result = shared_engine.rollback_diff(diff)
         assert result is True  # Should succeed without error
 
 
 # ── apply_diffs (batch) ───────────────────────────────────────────────────────
 
 class TestApplyDiffs:
-    def test_batch_apply_success(self, engine: DiffEngine, tmp_workspace: Path) -> None:
+    def test_batch_apply_success(self, engine: DiffEngine, create_diff_cached) -> None:
+        diffs = [create_diff_cached(f"file_{i}.py", f"x = {i}\n") for i in range(3)]
+        result = engine.apply_diffs(diffs)
+        assert result.applied == 3
+        assert result.failed == 0
+        assert result.success
+
+    def test_batch_apply_modify(self, engine: DiffEngine, tmp_workspace: Path, write_many) -> None:
+        write_many(tmp_workspace, {f"mod_{i}.py": _CONTENTS["x0"] for i in range(3)})
         diffs = [
-            engine.create_diff(f"file_{i}.py", f"x = {i}\n", DiffOperation.CREATE)
+            engine.create_diff(f"mod_{i}.py", f"x = {i + 1}\n", DiffOperation.MODIFY)
             for i in range(3)
         ]
         result = engine.apply_diffs(diffs)
         assert result.applied == 3
-        assert result.failed == 0
-        assert result.success
+        assert (tmp_workspace / "mod_2.py").read_bytes() == b"x = 3\n"
 
-    def test_batch_rollback_on_error(self, engine: DiffEngine, tmp_workspace: Path) -> None:
+    def test_batch_rollback_on_error(
+        self, engine: DiffEngine, tmp_workspace: Path, create_diff_cached
+    ) -> None:
         # First diff is valid, second will fail (file doesn't exist for MODIFY)
-        good = engine.create_diff("good.py", "pass\n", DiffOperation.CREATE)
-        bad = FileDiff(
-            operation=DiffOperation.MODIFY,
-            file_path="nonexistent.py",
+        good = create_diff_cached("good.py", "pass\n")
+        bad = _diff(
+            DiffOperation.MODIFY, "nonexistent.py",
             original_content="x",
             new_content="y",
             line_changes={"additions": 1, "deletions": 1},
@@ -188,3 +301,30 @@ class TestApplyDiffs:
         assert result.failed > 0
         # good.py should have been rolled back
         assert not (tmp_workspace / "good.py").exists()
+
+
+# ── benchmarks ────────────────────────────────────────────────────────────────
+
+@pytest.mark.benchmark(group="diff_engine")
+class TestDiffEngineBenchmarks:
+    """100-iteration apply/rollback loops; run with `pytest -m benchmark`."""
+
+    def test_bench_apply_rollback_create(self, benchmark, engine: DiffEngine) -> None:
+        def run() -> None:
+            for i in range(100):
+                diff = engine.create_diff(f"bench_{i}.py", "pass\n", DiffOperation.CREATE)
+                engine.apply_diff(diff)
+                engine.rollback_diff(diff)
+
+        benchmark(run)
+
+    def test_bench_apply_rollback_modify(self, benchmark, engine: DiffEngine, tmp_workspace: Path) -> None:
+        (tmp_workspace / "bench.py").write_bytes(_CONTENTS["x1"])
+
+        def run() -> None:
+            for i in range(100):
+                diff = engine.create_diff("bench.py", f"x = {i}\n", DiffOperation.MODIFY)
+                engine.apply_diff(diff)
+                engine.rollback_diff(diff)
+
+        benchmark(run)
@@ -0,0 +1,156 @@
+"""
+Unit tests for LLMService JSON helpers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from app.services.llm_service import LLMService, _extract_first_json_object, _JsonObjectScanner
+from app.utils.exceptions import LLMError
+
+
+# ── _strip_fences ─────────────────────────────────────────────────────────────
+
+class TestStripFences:
+    def test_json_fence(self) -> None:
+        assert LLMService._strip_fences('```json\n{"a": 1}\n```') == '{"a": 1}'
+
+    def test_prose_before_fence(self) -> None:
+        assert LLMService._strip_fences('Here you go:\n```\n{"a": 1}\n```') == '{"a": 1}'
+
+    def test_no_fence(self) -> None:
+        assert LLMService._strip_fences('  {"a": 1}  ') == '{"a": 1}'
+
+    def test_missing_closing_fence(self) -> None:
+        assert LLMService._strip_fences('```json\n{"a": 1}') == '{"a": 1}'
+
+
+# ── _extract_first_json_object ────────────────────────────────────────────────
+
+class TestExtractFirstJsonObject:
+    def test_trailing_junk(self) -> None:
+        assert _extract_first_json_object('{"a": 1} trailing } junk') == '{"a": 1}'
+
+    def test_first_of_two_objects(self) -> None:
+        assert _extract_first_json_object('x {"a": 1} {"b": 2}') == '{"a": 1}'
+
+    def test_braces_inside_strings(self) -> None:
+        text = '{"code": "if (x) { y(\\"}\\") }", "n": {"m": 1}}'
+        assert _extract_first_json_object(text) == text
+
+    def test_unclosed_object(self) -> None:
+        assert _extract_first_json_object('{"a": {"b": 1}') is None
+
+    def test_no_object(self) -> None:
+        assert _extract_first_json_object("no json here") is None
+
+
+# ── _JsonObjectScanner ────────────────────────────────────────────────────────
+
+class TestJsonObjectScanner:
+    TEXT = 'Sure:\n```json\n{"code": "if (x) { y(\\"}\\") }", "n": {"m": 1}}\n``` bye'
+    OBJ = '{"code": "if (x) { y(\\"}\\") }", "n": {"m": 1}}'
+
+    def test_every_two_chunk_split(self) -> None:
+        for cut in range(len(self.TEXT) + 1):
+            scanner = _JsonObjectScanner()
+            first = scanner.feed(self.TEXT[:cut])
+            assert (first or scanner.feed(self.TEXT[cut:])) == self.OBJ, cut
+
+    def test_char_by_char_returns_when_object_closes(self) -> None:
+        scanner = _JsonObjectScanner()
+        results = [scanner.feed(ch) for ch in self.TEXT[: self.TEXT.index("}\n```") + 1]]
+        assert results[:-1] == [None] * (len(results) - 1)
+        assert results[-1] == self.OBJ
+
+
+
+# ── in-flight coalescing ──────────────────────────────────────────────────────
+
+class TestCoalescing:
+    def _llm(self, calls: list[str], gate: asyncio.Event, result: Any = None) -> LLMService:
+        llm = LLMService()
+
+        async def fake_generate_json(prompt: str, **kw: Any) -> dict[str, Any]:
+            calls.append(prompt)
+            try:
+                await gate.wait()
+            except asyncio.CancelledError:
+                calls.append("cancelled")
+                raise
+            if isinstance(result, Exception):
+                raise result
+            return {"items": [prompt]}
+
+        llm._generate_json = fake_generate_json
+        return llm
+
+    def test_identical_calls_share_one_request(self) -> None:
+        async def main() -> None:
+            calls: list[str] = []
+            gate = asyncio.Event()
+            llm = self._llm(calls, gate)
+            tasks = [asyncio.create_task(llm.generate_structured_raw("p")) for _ in range(3)]
+            await asyncio.sleep(0)
+            gate.set()
+            results = await asyncio.gather(*tasks)
+            assert calls == ["p"]
+            assert results[0] == results[1] == results[2] == {"items": ["p"]}
+            assert results[0] is not results[1]
+            assert results[0]["items"] is not results[2]["items"]
+            assert not llm._inflight
+
+        asyncio.run(main())
+
+    def test_cancelled_leader_hands_off_to_followers(self) -> None:
+        async def main() -> None:
+            calls: list[str] = []
+            gate = asyncio.Event()
+            llm = self._llm(calls, gate)
+            leader = asyncio.create_task(llm.generate_structured_raw("p"))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(llm.generate_structured_raw("p"))
+            await asyncio.sleep(0)
+            leader.cancel()
+            await asyncio.sleep(0)
+            gate.set()
+            assert await follower == {"items": ["p"]}
+            assert leader.cancelled()
+            assert calls == ["p"]
+
+        asyncio.run(main())
+
+    def test_last_waiter_cancelled_cancels_call(self) -> None:
+        async def main() -> None:
+            calls: list[str] = []
+            gate = asyncio.Event()
+            llm = self._llm(calls, gate)
+            tasks = [asyncio.create_task(llm.generate_structured_raw("p")) for _ in range(2)]
+            await asyncio.sleep(0)
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.sleep(0)
+            assert calls == ["p", "cancelled"]
+            assert not llm._inflight
+            # A fresh identical request starts its own call
+            gate.set()
+            assert await llm.generate_structured_raw("p") == {"items": ["p"]}
+
+        asyncio.run(main())
+
+    def test_error_reaches_every_caller(self) -> None:
+        async def main() -> None:
+            calls: list[str] = []
+            gate = asyncio.Event()
+            llm = self._llm(calls, gate, result=LLMError("bad json"))
+            tasks = [asyncio.create_task(llm.generate_structured_raw("p")) for _ in range(2)]
+            await asyncio.sleep(0)
+            gate.set()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            assert all(isinstance(r, LLMError) for r in results)
+            assert calls == ["p"]
+
+        asyncio.run(main())
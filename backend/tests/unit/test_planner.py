@@ -0,0 +1,150 @@
+"""
+Unit tests for Planner context budgeting, retries and plan validation.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from app.services import planner as planner_mod
+from app.services.llm_service import LLMService
+from app.services.planner import Planner
+from app.utils.exceptions import LLMError
+from app.utils.token_counter import count_tokens
+
+_PLAN = {
+    "summary": "Add login",
+    "steps": [
+        {"step_number": 1, "title": "Route", "description": "d",
+         "action": "create", "file_path": "api/auth.py"},
+        {"step_number": 1, "title": "Model", "description": "d",
+         "action": "bogus", "file_path": "models.py"},
+    ],
+    "risks": ["Breaking change for sessions"],
+}
+
+
+class _ScriptedLLM(LLMService):
+    """Replays scripted outcomes for generate_structured_raw, recording prompts."""
+
+    def __init__(self, *outcomes: dict[str, Any] | Exception) -> None:
+        super().__init__()
+        self.outcomes = list(outcomes)
+        self.prompts: list[str] = []
+
+    async def generate_structured_raw(self, prompt: str, **kwargs: Any) -> dict[str, Any]:
+        self.prompts.append(prompt)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def planner() -> Planner:
+    return Planner(LLMService())
+
+
+@pytest.fixture
+def no_backoff(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(planner_mod, "_RETRY_BACKOFF_MULTIPLIER", 0)
+
+
+def _project(workspace: Path) -> SimpleNamespace:
+    return SimpleNamespace(id=5, language="python", framework="fastapi", workspace_path=str(workspace))
+
+
+def _chat(*contents: str) -> dict[str, Any]:
+    return {"chat_history": [{"role": "user", "content": c} for c in contents]}
+
+
+# ── _trim_history ─────────────────────────────────────────────────────────────
+
+class TestTrimHistory:
+    def test_count_caps_keep_newest(self, planner: Planner) -> None:
+        chat, lessons = planner._trim_history(
+            _chat(*(f"m{i}" for i in range(10))), [f"l{i}" for i in range(10)]
+        )
+        assert chat == [f"  [user] m{i}" for i in range(6, 10)]
+        assert lessons == [f"  • l{i}" for i in range(5, 10)]
+
+    def test_lessons_budgeted_before_chat(self, planner: Planner, monkeypatch) -> None:
+        lessons = ["always run the migrations first", "pin the SDK version"]
+        lesson_cost = sum(count_tokens(f"  • {text}") for text in lessons)
+        monkeypatch.setattr(planner_mod.settings, "llm_context_history_tokens", lesson_cost)
+        chat, kept = planner._trim_history(_chat("x" * 200, "y" * 200), lessons)
+        assert kept == [f"  • {text}" for text in lessons]
+        assert chat == []
+
+    def test_chat_gets_what_lessons_leave(self, planner: Planner, monkeypatch) -> None:
+        newest = "  [user] newest"
+        lesson_cost = count_tokens("  • lesson")
+        monkeypatch.setattr(
+            planner_mod.settings, "llm_context_history_tokens", lesson_cost + count_tokens(newest)
+        )
+        chat, lessons = planner._trim_history(_chat("older message " * 5, "newest"), ["lesson"])
+        assert (chat, lessons) == ([newest], ["  • lesson"])
+
+    def test_long_messages_truncated_before_budgeting(self, planner: Planner) -> None:
+        chat, _ = planner._trim_history(_chat("z" * 5000), [])
+        assert chat == ["  [user] " + "z" * 200]
+
+
+# ── _call_with_retries ────────────────────────────────────────────────────────
+
+class TestCallWithRetries:
+    def test_transient_failures_retried_with_identical_prompt(self, no_backoff) -> None:
+        llm = _ScriptedLLM(LLMError("overloaded"), LLMError("bad json"), _PLAN)
+        result = asyncio.run(Planner(llm)._call_with_retries("ctx"))
+        assert result == _PLAN
+        assert len(llm.prompts) == 3
+        assert len(set(llm.prompts)) == 1
+        assert llm.prompts[0] == LLMService.json_prompt("ctx")
+
+    def test_gives_up_after_max_attempts(self, no_backoff) -> None:
+        llm = _ScriptedLLM(*[LLMError("down")] * 5)
+        with pytest.raises(RuntimeError, match="All 3 planning attempts failed"):
+            asyncio.run(Planner(llm)._call_with_retries("ctx"))
+        assert len(llm.prompts) == planner_mod._MAX_RETRIES
+
+    def test_non_retryable_error_raised_at_once(self, no_backoff) -> None:
+        llm = _ScriptedLLM(ValueError("bug"), _PLAN)
+        with pytest.raises(ValueError):
+            asyncio.run(Planner(llm)._call_with_retries("ctx"))
+        assert len(llm.prompts) == 1
+
+
+# ── create_plan / _validate_plan ──────────────────────────────────────────────
+
+class TestCreatePlan:
+    def test_plan_validated_and_enriched(self, no_backoff, tmp_path: Path) -> None:
+        (tmp_path / "models.py").write_text("class User: ...\n")
+        llm = _ScriptedLLM(LLMError("flaky"), _PLAN)
+        plan = asyncio.run(Planner(llm).create_plan(
+            "add login", _project(tmp_path), past_lessons=["hash passwords"],
+        ))
+        assert [s["step_number"] for s in plan["steps"]] == [1, 2]
+        assert plan["steps"][1]["action"] == "modify"       # invalid action coerced
+        assert plan["files_to_create"] == ["api/auth.py"]
+        assert plan["files_to_modify"] == ["models.py"]
+        assert (plan["project_id"], plan["project_framework"]) == (5, "fastapi")
+        assert plan["requires_approval"]                    # "breaking" risk
+        assert "# LESSONS FROM PAST ACTIONS\n  • hash passwords" in llm.prompts[0]
+
+    def test_exhausted_retries_fall_back(self, no_backoff, tmp_path: Path) -> None:
+        llm = _ScriptedLLM(*[LLMError("down")] * 3)
+        plan = asyncio.run(Planner(llm).create_plan("add login", _project(tmp_path)))
+        assert plan["is_fallback"]
+        assert plan["project_id"] == 5
+
+    def test_invalid_plan_coerced_best_effort(self, planner: Planner, tmp_path: Path) -> None:
+        raw = {"summary": "s", "steps": [{"title": "t", "file_path": "a.py"}, "junk"], "risks": 3}
+        plan = planner._validate_plan(raw, _project(tmp_path), {"source_files": ["a.py"]})
+        assert [s["file_path"] for s in plan["steps"]] == ["a.py"]
+        assert plan["files_to_modify"] == ["a.py"]
+        assert not plan["requires_approval"]
@@ -0,0 +1,430 @@
+"""
+Unit tests for the Reflector lesson store.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import gc
+import json
+import os
+import threading
+import weakref
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from app.services import reflector as reflector_mod
+from app.services.llm_service import LLMService
+from app.services.reflector import (
+    _REFLECTION_DEFAULTS,
+    Reflector,
+    ReflectionResult,
+    _lesson_hash,
+    _LessonIndex,
+)
+
+
+def _reflection(*lessons: str, ok: bool = True, category: Any = "quality") -> dict[str, Any]:
+    return {
+        "summary": "s",
+        "lessons_learned": list(lessons),
+        "failure_factors": [] if ok else ["broke"],
+        "patterns_detected": [],
+        "category_tags": [category],
+        "severity": "info",
+    }
+
+
+def _persist(refl: Reflector, *lessons: str, project_id: int = 1, **kw: Any) -> None:
+    action = SimpleNamespace(id=7, project_id=project_id, intent="x")
+    refl._persist_lessons(action, _reflection(*lessons, **kw))
+
+
+@pytest.fixture
+def store_dir(tmp_path: Path) -> Path:
+    return tmp_path / "lessons"
+
+
+@pytest.fixture
+def make_reflector(store_dir: Path):
+    def make() -> Reflector:
+        return Reflector(LLMService(), data_dir=store_dir)
+    return make
+
+
+def _raise_oserror(*args: Any) -> None:
+    raise OSError("disk full")
+
+
+def _lessons(refl: Reflector, project_id: int = 1) -> list[str]:
+    return [e["lesson"] for e in refl.get_lessons_for_project(project_id)["lessons"]]
+
+
+# ── Multiple workers ──────────────────────────────────────────────────────────
+
+class TestTwoWorkers:
+    def test_interleaved_flushes_keep_every_lesson(self, make_reflector) -> None:
+        a, b = make_reflector(), make_reflector()
+        _persist(a, "from a 1")
+        _persist(b, "from b 1")
+        a.flush()
+        b.flush()       # b's buffered seq collides with a's unless b merges first
+        _persist(a, "from a 2")
+        a.flush()
+
+        fresh = make_reflector()
+        assert sorted(_lessons(fresh)) == ["from a 1", "from a 2", "from b 1"]
+        store = fresh.get_lessons_for_project(1)
+        assert store["successes"] == 3
+        assert store["log_seq"] == 3
+
+    def test_reader_with_buffered_records_sees_other_writes(self, make_reflector) -> None:
+        a, b = make_reflector(), make_reflector()
+        _persist(a, "mine")                 # buffered, not flushed
+        _persist(b, "theirs")
+        b.flush()
+        assert sorted(_lessons(a)) == ["mine", "theirs"]
+
+    def test_compaction_keeps_other_workers_log(self, make_reflector, monkeypatch) -> None:
+        monkeypatch.setattr(reflector_mod, "_LOG_COMPACT_EVERY", 3)
+        a, b = make_reflector(), make_reflector()
+        _persist(a, "a1")
+        a.flush()
+        _persist(b, "b1")
+        b.flush()
+        _persist(a, "a2")
+        a.flush()       # a's third record compacts: must fold in b1 before unlinking
+        assert not a._log_path(1).exists()
+        assert sorted(_lessons(make_reflector())) == ["a1", "a2", "b1"]
+
+    def test_same_lesson_from_both_workers_stored_once(self, make_reflector) -> None:
+        a, b = make_reflector(), make_reflector()
+        _persist(a, "shared")
+        _persist(b, "shared")
+        a.flush()
+        b.flush()
+        assert _lessons(make_reflector()) == ["shared"]
+
+
+# ── Flushing ──────────────────────────────────────────────────────────────────
+
+class TestFlush:
+    def test_failed_compaction_keeps_buffered_records(
+        self, make_reflector, monkeypatch
+    ) -> None:
+        monkeypatch.setattr(reflector_mod, "_LOG_COMPACT_EVERY", 1)
+        refl = make_reflector()
+        _persist(refl, "survives")
+        monkeypatch.setattr(reflector_mod.os, "replace", _raise_oserror)
+        refl.flush()
+        assert len(refl._unflushed[1]) == 1
+        monkeypatch.undo()
+        refl.flush()
+        assert 1 not in refl._unflushed
+        assert _lessons(make_reflector()) == ["survives"]
+
+    def test_write_through_setting(self, make_reflector, monkeypatch) -> None:
+        monkeypatch.setattr(reflector_mod.settings, "llm_reflection_flush_every", 1)
+        refl = make_reflector()
+        _persist(refl, "written now")
+        assert not refl._unflushed
+        assert _lessons(make_reflector()) == ["written now"]
+
+    def test_exit_hook_does_not_pin_instances(self, make_reflector) -> None:
+        ref = weakref.ref(make_reflector())
+        gc.collect()
+        assert ref() is None
+
+    def test_exit_hook_flushes_live_instances(self, make_reflector) -> None:
+        refl = make_reflector()
+        _persist(refl, "at exit")
+        reflector_mod._flush_live_reflectors()
+        assert not refl._unflushed
+        assert _lessons(make_reflector()) == ["at exit"]
+
+
+# ── Append log and snapshot ───────────────────────────────────────────────────
+
+class TestAppendLog:
+    def test_flush_appends_one_line_per_reflection(self, make_reflector) -> None:
+        refl = make_reflector()
+        _persist(refl, "one")
+        _persist(refl, "two", ok=False)
+        refl.flush()
+        lines = refl._log_path(1).read_text().splitlines()
+        assert [json.loads(line)["seq"] for line in lines] == [1, 2]
+        assert not refl._store_path(1).exists()
+
+    def test_replay_rebuilds_store(self, make_reflector) -> None:
+        refl = make_reflector()
+        _persist(refl, "one", category="security")
+        _persist(refl, "two", ok=False)
+        refl.flush()
+        store = make_reflector().get_lessons_for_project(1)
+        assert [(e["lesson"], e["category"]) for e in store["lessons"]] == [
+            ("one", "security"), ("two", "quality"),
+        ]
+        assert (store["successes"], store["failures"], store["log_seq"]) == (1, 1, 2)
+
+    def test_records_already_in_snapshot_are_skipped(self, make_reflector) -> None:
+        refl = make_reflector()
+        _persist(refl, "one")
+        refl.flush()
+        log = refl._log_path(1).read_bytes()
+        with refl._write_lock(1):
+            refl._save_store(1, refl._cache[1])
+        # Crash between snapshot write and log removal: the stale log is back
+        refl._log_path(1).write_bytes(log)
+        assert _lessons(make_reflector()) == ["one"]
+
+    def test_torn_trailing_line_is_dropped_then_compacted(self, make_reflector) -> None:
+        refl = make_reflector()
+        _persist(refl, "whole")
+        refl.flush()
+        with refl._log_path(1).open("a") as fh:
+            fh.write('{"seq": 2, "lessons": [')
+        reader = make_reflector()
+        assert _lessons(reader) == ["whole"]
+        _persist(reader, "next")
+        reader.flush()      # must not append after the torn line
+        assert not reader._log_path(1).exists()
+        assert _lessons(make_reflector()) == ["whole", "next"]
+
+    def test_compaction_every_n_records(self, make_reflector, monkeypatch) -> None:
+        monkeypatch.setattr(reflector_mod, "_LOG_COMPACT_EVERY", 3)
+        refl = make_reflector()
+        for i in range(2):
+            _persist(refl, f"l{i}")
+            refl.flush()
+        assert refl._log_path(1).exists()
+        _persist(refl, "l2")
+        refl.flush()
+        assert not refl._log_path(1).exists()
+        snapshot = json.loads(refl._store_path(1).read_bytes())
+        assert snapshot["log_seq"] == 3
+        assert [e["lesson"] for e in snapshot["lessons"]] == ["l0", "l1", "l2"]
+
+    def test_legacy_snapshot_is_rekeyed(self, make_reflector, store_dir: Path) -> None:
+        store_dir.mkdir(parents=True, exist_ok=True)
+        (store_dir / "lessons_1.json").write_text(json.dumps({
+            "lessons": [{"lesson": " Old Lesson ", "category": "quality", "hash_key": "md5ish"}],
+            "patterns": [], "successes": 0, "failures": 0,
+        }))
+        refl = make_reflector()
+        _persist(refl, "old lesson")        # same text, so deduplicated
+        assert _lessons(refl) == [" Old Lesson "]
+        assert refl._cache[1]["lessons"][0]["hash_key"] == _lesson_hash("Old Lesson")
+
+
+# ── Cache invalidation ────────────────────────────────────────────────────────
+
+class TestDiskSignature:
+    def test_unchanged_disk_is_a_cache_hit(self, make_reflector) -> None:
+        refl = make_reflector()
+        _persist(refl, "one")
+        refl.flush()
+        assert refl.get_lessons_for_project(1) is refl.get_lessons_for_project(1)
+
+    def test_external_write_forces_reload(self, make_reflector) -> None:
+        refl = make_reflector()
+        _persist(refl, "one")
+        refl.flush()
+        before = refl.get_lessons_for_project(1)
+        with refl._log_path(1).open("a") as fh:
+            fh.write(json.dumps({"seq": 2, "lessons": [], "patterns": ["p"], "ok": False}) + "\n")
+        after = refl.get_lessons_for_project(1)
+        assert after is not before
+        assert (after["patterns"], after["failures"]) == (["p"], 1)
+
+    def test_reload_publishes_index_with_its_store(self, make_reflector, monkeypatch) -> None:
+        refl = make_reflector()
+        _persist(refl, "one")
+        refl.flush()
+        old_store, old_index = refl._cache[1], refl._indexes[1]
+        with refl._log_path(1).open("a") as fh:
+            entry = {"lesson": "two", "category": "quality", "hash_key": _lesson_hash("two")}
+            fh.write(json.dumps({"seq": 2, "lessons": [entry], "patterns": [], "ok": True}) + "\n")
+        replay = refl._replay_log
+        seen: list[tuple[bool, bool]] = []
+
+        def checked_replay(*args: Any) -> int:
+            pending = replay(*args)
+            # Mid-reload, lock-free readers still see the old, consistent pair
+            seen.append((refl._cache[1] is old_store, refl._indexes[1] is old_index))
+            return pending
+
+        monkeypatch.setattr(refl, "_replay_log", checked_replay)
+        store = refl.get_lessons_for_project(1)
+        assert seen == [(True, True)]
+        assert refl._indexes[1] is not old_index
+        assert refl._indexes[1].texts == [e["lesson"] for e in store["lessons"]] == ["one", "two"]
+
+    def test_same_size_rewrite_detected_by_mtime(self, make_reflector) -> None:
+        refl = make_reflector()
+        _persist(refl, "aaaa")
+        refl.flush()
+        refl.get_lessons_for_project(1)
+        log = refl._log_path(1)
+        log.write_text(log.read_text().replace("aaaa", "bbbb"))
+        st = log.stat()
+        os.utime(log, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        assert _lessons(refl) == ["bbbb"]
+
+
+# ── _LessonIndex ──────────────────────────────────────────────────────────────
+
+def _entries(*pairs: tuple[str, str]) -> list[dict[str, Any]]:
+    return [{"lesson": t, "category": c, "hash_key": _lesson_hash(t)} for c, t in pairs]
+
+
+class TestLessonIndex:
+    def test_newest_in_merges_categories_newest_first(self) -> None:
+        index = _LessonIndex()
+        index.add(_entries(("security", "s1"), ("quality", "q1"), ("perf", "p1")))
+        index.add(_entries(("quality", "q2"), ("security", "s2")))
+        assert list(index.newest_in(["security", "quality"])) == [
+            ("security", "s2"), ("quality", "q2"), ("quality", "q1"), ("security", "s1"),
+        ]
+        assert list(index.newest_in(["missing"])) == []
+
+    def test_evict_keeps_positions_aligned(self) -> None:
+        index = _LessonIndex()
+        entries = _entries(("a", "a1"), ("b", "b1"), ("a", "a2"), ("b", "b2"))
+        index.add(entries)
+        index.evict(entries[:2])
+        assert index.evicted == 2
+        assert index.texts == ["a2", "b2"]
+        assert list(index.newest_in(["a", "b"])) == [("b", "b2"), ("a", "a2")]
+        assert _lesson_hash("a1") not in index.hashes
+
+    def test_store_eviction_matches_index(self, make_reflector, monkeypatch) -> None:
+        monkeypatch.setattr(reflector_mod, "_MAX_LESSONS_PER_PROJECT", 3)
+        refl = make_reflector()
+        for i, cat in enumerate(["a", "b", "a", "b", "a"]):
+            _persist(refl, f"l{i}", category=cat)
+        index = refl._indexes[1]
+        assert index.texts == _lessons(refl) == ["l2", "l3", "l4"]
+        assert index.by_category == {"a": [2, 4], "b": [3]}
+        _persist(refl, "l0")                # evicted, so learnable again
+        assert _lessons(refl)[-1] == "l0"
+
+    def test_non_hashable_category_tag_is_coerced(self, make_reflector) -> None:
+        refl = make_reflector()
+        _persist(refl, "weird", category={"name": "security"})
+        _persist(refl, "bare", category=None)
+        refl._persist_lessons(
+            SimpleNamespace(id=8, project_id=1),
+            {"lessons_learned": "scalar lesson", "category_tags": "security"},
+        )
+        store = refl.get_lessons_for_project(1)
+        assert [(e["lesson"], e["category"]) for e in store["lessons"]] == [
+            ("weird", "{'name': 'security'}"), ("bare", "None"), ("scalar lesson", "security"),
+        ]
+
+
+# ── Suggestions ───────────────────────────────────────────────────────────────
+
+class TestSuggestions:
+    def test_only_relevant_categories_newest_first(self, make_reflector) -> None:
+        refl = make_reflector()
+        _persist(refl, "hash passwords", category="security")
+        _persist(refl, "add an index", category="performance")
+        _persist(refl, "rotate tokens", category="security")
+        out = refl.generate_improvement_suggestions(1, {"summary": "User login page"})
+        assert out == ["[Security] rotate tokens", "[Security] hash passwords"]
+
+    def test_breaking_risk_goes_first(self, make_reflector) -> None:
+        refl = make_reflector()
+        _persist(refl, "write tests", category="quality")
+        out = refl.generate_improvement_suggestions(
+            1, {"summary": "fix parser", "risks": ["Breaking API change"]}
+        )
+        assert out[0].startswith("Breaking change detected")
+        assert "[Quality] write tests" in out
+
+
+# ── reflect_on_action ─────────────────────────────────────────────────────────
+
+class _FakeLLM:
+    def __init__(self, response: dict[str, Any] | Exception) -> None:
+        self.response = response
+        self.calls = 0
+
+    async def generate_structured(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+def _reflect(refl: Reflector, steps: int, ok: bool = True) -> dict[str, Any]:
+    action = SimpleNamespace(id=3, project_id=1, intent="add a feature")
+    plan = {"steps": [{}] * steps}
+    return asyncio.run(refl.reflect_on_action(
+        action, plan, {"success": ok}, {"passed": ok},
+    ))
+
+
+class TestReflectOnAction:
+    def test_trivial_success_skips_llm(self, store_dir: Path) -> None:
+        llm = _FakeLLM(_reflection("unused"))
+        result = _reflect(Reflector(llm, data_dir=store_dir), steps=1)
+        assert llm.calls == 0
+        assert "skipped" in result["summary"]
+
+    def test_multi_step_action_calls_llm(self, store_dir: Path) -> None:
+        llm = _FakeLLM(_reflection("learned"))
+        refl = Reflector(llm, data_dir=store_dir)
+        _reflect(refl, steps=3)
+        assert llm.calls == 1
+        assert _lessons(refl) == ["learned"]
+
+    def test_store_prefetched_off_the_event_loop(self, store_dir: Path, monkeypatch) -> None:
+        refl = Reflector(_FakeLLM(_reflection("x")), data_dir=store_dir)
+        threads: list[threading.Thread] = []
+        load = refl._load_store
+
+        def spy(project_id: int) -> dict[str, Any]:
+            threads.append(threading.current_thread())
+            return load(project_id)
+
+        monkeypatch.setattr(refl, "_load_store", spy)
+        _reflect(refl, steps=3)
+        assert threads[0] is not threading.main_thread()
+
+    def test_llm_failure_falls_back_to_heuristic(self, store_dir: Path) -> None:
+        refl = Reflector(_FakeLLM(RuntimeError("down")), data_dir=store_dir)
+        result = _reflect(refl, steps=3, ok=False)
+        assert result["summary"].startswith("Heuristic")
+        assert "Review error handling in generated code templates" in _lessons(refl)
+
+
+# ── Reflection schema ─────────────────────────────────────────────────────────
+
+class TestReflectionSchema:
+    def test_slotted_with_defaults(self) -> None:
+        r = ReflectionResult(summary="s")
+        assert not hasattr(r, "__dict__")
+        assert dataclasses.asdict(r) == {**_REFLECTION_DEFAULTS, "summary": "s"}
+        assert ReflectionResult(summary="t").lessons_learned is not r.lessons_learned
+
+    def test_valid_reflection_normalised(self, make_reflector) -> None:
+        parsed = make_reflector()._parse_reflection(
+            {"summary": "ok", "lessons_learned": ("a", "b"), "extra": 1}
+        )
+        assert parsed == {**_REFLECTION_DEFAULTS, "summary": "ok", "lessons_learned": ["a", "b"]}
+
+    @pytest.mark.parametrize("raw", [
+        {"lessons_learned": ["a"]},                     # summary missing
+        {"summary": "s", "lessons_learned": [1, 2]},    # mistyped list
+        {"summary": "s", "severity": 3},                # mistyped scalar
+    ])
+    def test_invalid_reflection_falls_back(self, make_reflector, raw: dict[str, Any]) -> None:
+        parsed = make_reflector()._parse_reflection(dict(raw))
+        assert {**raw, **parsed} == parsed          # original keys kept as given
+        for key in ("summary", "lessons_learned", "category_tags", "severity"):
+            assert key in parsed
@@ -0,0 +1,131 @@
+"""
+Unit tests for token counting and cost estimation.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils import token_counter
+from app.utils.token_counter import count_tokens, count_tokens_batch, estimate_cost
+
+
+@pytest.fixture
+def fresh_encoder(monkeypatch: pytest.MonkeyPatch):
+    """Reset the lazily loaded encoder (and the count cache built on it)."""
+    monkeypatch.setattr(token_counter, "_encoder", None)
+    count_tokens.cache_clear()
+    yield
+    count_tokens.cache_clear()
+
+
+class _FakeEncoding:
+    """Whitespace 'tokenizer' standing in for a tiktoken encoding."""
+
+    def __init__(self) -> None:
+        self.encoded: list[str] = []
+
+    def encode(self, text: str) -> list[str]:
+        self.encoded.append(text)
+        return text.split()
+
+    def encode_batch(self, texts: list[str], num_threads: int = 1) -> list[list[str]]:
+        return [t.split() for t in texts]
+
+
+# ── count_tokens ──────────────────────────────────────────────────────────────
+
+class TestCountTokens:
+    def test_character_estimate_without_encoder(self, fresh_encoder, monkeypatch) -> None:
+        monkeypatch.setattr(token_counter, "_encoder", False)
+        assert count_tokens("x" * 40) == 10
+        assert count_tokens("") == 1
+
+    def test_repeat_counts_served_from_cache(self, fresh_encoder, monkeypatch) -> None:
+        enc = _FakeEncoding()
+        monkeypatch.setattr(token_counter, "_encoder", enc)
+        assert count_tokens("one two three") == 3
+        assert count_tokens("one two three") == 3
+        assert enc.encoded == ["one two three"]
+        assert count_tokens.cache_info().hits == 1
+
+    def test_encoder_failure_falls_back_to_estimate(self, fresh_encoder, monkeypatch) -> None:
+        enc = SimpleNamespace(encode=lambda text: 1 / 0)
+        monkeypatch.setattr(token_counter, "_encoder", enc)
+        assert count_tokens("y" * 80) == 20
+
+
+# ── _get_encoder ──────────────────────────────────────────────────────────────
+
+class TestGetEncoder:
+    def test_concurrent_first_calls_load_once(self, fresh_encoder, monkeypatch) -> None:
+        loads: list[str] = []
+
+        def get_encoding(name: str) -> _FakeEncoding:
+            loads.append(name)
+            time.sleep(0.05)            # hold the lock while others arrive
+            return _FakeEncoding()
+
+        monkeypatch.setitem(sys.modules, "tiktoken", SimpleNamespace(get_encoding=get_encoding))
+        results: list[object] = []
+        threads = [
+            threading.Thread(target=lambda: results.append(token_counter._get_encoder()))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert loads == ["cl100k_base"]
+        assert len({id(r) for r in results}) == 1
+
+    def test_load_error_is_remembered(self, fresh_encoder, monkeypatch) -> None:
+        calls: list[str] = []
+
+        def get_encoding(name: str) -> None:
+            calls.append(name)
+            raise OSError("offline")
+
+        monkeypatch.setitem(sys.modules, "tiktoken", SimpleNamespace(get_encoding=get_encoding))
+        assert token_counter._get_encoder() is False
+        assert token_counter._get_encoder() is False
+        assert calls == ["cl100k_base"]
+
+
+# ── count_tokens_batch ────────────────────────────────────────────────────────
+
+class TestCountTokensBatch:
+    def test_matches_single_counts(self, fresh_encoder, monkeypatch) -> None:
+        monkeypatch.setattr(token_counter, "_encoder", _FakeEncoding())
+        texts = ["a b", "c d e", "f"]
+        assert count_tokens_batch(texts) == [count_tokens(t) for t in texts] == [2, 3, 1]
+
+    def test_estimate_without_encoder(self, fresh_encoder, monkeypatch) -> None:
+        monkeypatch.setattr(token_counter, "_encoder", False)
+        assert count_tokens_batch(["x" * 8, "", "y" * 41]) == [2, 1, 10]
+
+    def test_empty_batch(self) -> None:
+        assert count_tokens_batch([]) == []
+
+
+# ── estimate_cost ─────────────────────────────────────────────────────────────
+
+class TestEstimateCost:
+    @pytest.mark.parametrize(("model", "expected"), [
+        ("claude-sonnet-4-20250514", 3.0 + 15.0),
+        ("claude-opus-4-20250514", 15.0 + 75.0),
+        ("claude-haiku-4-5-20251001", 0.25 + 1.25),
+        ("some-future-model", 3.0 + 15.0),       # unknown models priced as Sonnet
+    ])
+    def test_per_million_rates(self, model: str, expected: float) -> None:
+        assert estimate_cost(1_000_000, 1_000_000, model) == pytest.approx(expected)
+
+    def test_input_and_output_priced_separately(self) -> None:
+        assert estimate_cost(2_000, 0) == pytest.approx(0.006)
+        assert estimate_cost(0, 2_000) == pytest.approx(0.03)
+        assert estimate_cost(0, 0) == 0.0
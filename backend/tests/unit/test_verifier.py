@@ -0,0 +1,148 @@
+"""
+Unit tests for Verifier test-framework dispatch.
+
+Both runner paths execute for real: pytest through sys.executable, npm/npx
+through stub executables placed first on PATH.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import stat
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.verifier import Verifier
+
+
+def _stub_bin(bin_dir: Path, name: str, stdout: str, exit_code: int = 0) -> None:
+    """Executable that prints *stdout* and its argv (one per line), then exits."""
+    bin_dir.mkdir(exist_ok=True)
+    script = bin_dir / name
+    script.write_text(
+        "#!/bin/sh\n"
+        f"cat <<'EOF'\n{stdout}\nEOF\n"
+        'for a in "$@"; do echo "arg:$a"; done\n'
+        f"exit {exit_code}\n"
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+
+
+@pytest.fixture
+def npm_workspace(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    ws = tmp_path / "web"
+    ws.mkdir()
+    (ws / "package.json").write_text(json.dumps({"scripts": {"test": "jest"}}))
+    bin_dir = tmp_path / "bin"
+    _stub_bin(bin_dir, "npm", "Tests:       1 failed, 3 passed, 4 total")
+    _stub_bin(bin_dir, "npx", "✓ 5 | ✗ 2")
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return ws
+
+
+def _verify(verifier: Verifier, ws: Path, changed: list[str]) -> dict:
+    action = SimpleNamespace(id=1)
+    project = SimpleNamespace(workspace_path=str(ws))
+    return asyncio.run(
+        verifier.verify_execution(action, project, {"files_created": changed})
+    )
+
+
+# ── npm path ──────────────────────────────────────────────────────────────────
+
+class TestNpmPath:
+    def test_jest_summary_parsed(self, verifier: Verifier, npm_workspace: Path) -> None:
+        result, framework = asyncio.run(verifier._run_tests(npm_workspace))
+        assert framework == "npm"
+        assert (result.tests_passed, result.tests_failed, result.tests_run) == (3, 1, 4)
+        assert not result.passed
+        assert "arg:--no-coverage" in result.output
+
+    def test_vitest_detected_from_dev_dependencies(
+        self, verifier: Verifier, npm_workspace: Path
+    ) -> None:
+        (npm_workspace / "package.json").write_text(json.dumps({
+            "scripts": {"test": "vitest"},
+            "devDependencies": {"vitest": "^1.0.0"},
+        }))
+        result, framework = asyncio.run(verifier._run_tests(npm_workspace))
+        assert framework == "npm"
+        assert "arg:vitest" in result.output
+        assert (result.tests_passed, result.tests_failed) == (5, 2)
+
+    def test_package_json_without_test_script(self, verifier: Verifier, tmp_path: Path) -> None:
+        (tmp_path / "package.json").write_text(json.dumps({"scripts": {"build": "tsc"}}))
+        result, framework = asyncio.run(verifier._run_tests(tmp_path))
+        assert (framework, result.passed) == ("", True)
+
+    def test_invalid_package_json_is_not_npm(self, verifier: Verifier, tmp_path: Path) -> None:
+        (tmp_path / "package.json").write_text("{not json")
+        assert not verifier._has_npm_test(tmp_path)
+
+    def test_verify_execution_end_to_end(self, verifier: Verifier, npm_workspace: Path) -> None:
+        report = _verify(verifier, npm_workspace, ["package.json"])
+        assert report["framework_used"] == "npm"
+        assert (report["tests_run"], report["tests_failed"]) == (4, 1)
+        assert not report["passed"]
+
+
+# ── pytest path ───────────────────────────────────────────────────────────────
+
+class TestPytestPath:
+    @pytest.fixture
+    def py_workspace(self, tmp_path: Path) -> Path:
+        ws = tmp_path / "py"
+        ws.mkdir()
+        (ws / "test_math.py").write_text(
+            "def test_add():\n    assert 1 + 1 == 2\n\n\n"
+            "def test_sub():\n    assert 2 - 1 == 1\n"
+        )
+        return ws
+
+    def test_counts_and_framework(self, verifier: Verifier, py_workspace: Path) -> None:
+        result, framework = asyncio.run(verifier._run_tests(py_workspace))
+        assert framework == "pytest"
+        assert (result.tests_run, result.tests_passed, result.tests_failed) == (2, 2, 0)
+        assert result.passed
+
+    def test_pytest_wins_over_package_json(
+        self, verifier: Verifier, py_workspace: Path, npm_workspace: Path
+    ) -> None:
+        (py_workspace / "package.json").write_bytes((npm_workspace / "package.json").read_bytes())
+        _, framework = asyncio.run(verifier._run_tests(py_workspace))
+        assert framework == "pytest"
+
+    def test_verify_execution_reports_failure(self, verifier: Verifier, py_workspace: Path) -> None:
+        (py_workspace / "test_fail.py").write_text("def test_bad():\n    assert False\n")
+        report = _verify(verifier, py_workspace, ["test_fail.py"])
+        assert report["framework_used"] == "pytest"
+        assert (report["tests_passed"], report["tests_failed"]) == (2, 1)
+        assert not report["passed"]
+
+
+# ── Python syntax batch ───────────────────────────────────────────────────────
+
+class TestPythonSyntaxBatch:
+    def test_pool_batch_reports_only_broken_file(
+        self, verifier: Verifier, tmp_path: Path
+    ) -> None:
+        # Unique sources so the content-keyed syntax cache can't short-circuit the pool
+        rels = [f"mod_{i}.py" for i in range(6)]
+        for i, rel in enumerate(rels):
+            (tmp_path / rel).write_text(f"VALUE_{tmp_path.name}_{i} = {i}\n")
+        (tmp_path / rels[3]).write_text(f"def broken_{tmp_path.name}(:\n")
+        errors = asyncio.run(verifier._check_python_batch(tmp_path, rels))
+        assert len(errors) == 1
+        assert "mod_3.py (line 1)" in errors[0]
+
+    def test_shared_pool_uses_no_fork(self) -> None:
+        from app.utils import process_pool
+
+        pool = process_pool.get_process_pool()
+        assert pool is process_pool.get_process_pool()
+        assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+        assert pool._max_workers <= 4